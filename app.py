@@ -4,18 +4,29 @@ Digital Signage Display Application
 A Flask-based digital signage solution for Raspberry Pi
 """
 
-from flask import Flask, render_template, jsonify, request, send_from_directory, session, redirect, url_for
-from datetime import datetime, timedelta
-from functools import wraps
+from flask import Flask, render_template, jsonify, request, send_from_directory, session, redirect, url_for, make_response
+from flask.json.provider import JSONProvider
+from datetime import datetime, timedelta, timezone
+from functools import wraps, lru_cache
+from operator import itemgetter
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 import os
-import json
+import copy
 import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import math
+import re
 import time
+import threading
 import hashlib
+import heapq
 from pathlib import Path
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape as xml_escape
 from zoneinfo import ZoneInfo
 
 # Configure logging
@@ -25,8 +36,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster (de)serialization"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand the encoded bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            mimetype='application/json'
+        )
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'digital-signage-secret-key-change-in-production')
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 3600  # Let browsers reuse static icons for an hour
 
 # Configuration
 BASE_DIR = Path(__file__).resolve().parent
@@ -35,11 +67,90 @@ DASHBOARD_CONFIG_FILE = BASE_DIR / 'dashboard_config.json'
 FLIGHT_ROUTES_CACHE_FILE = BASE_DIR / 'flight_routes_cache.json'
 AUTH_FILE = BASE_DIR / 'admin_auth.json'
 
+EARTH_RADIUS_KM = 6371
+
+# Display timezone for departures and the lecture timetable
+LOCAL_TZ = ZoneInfo('Europe/Vienna')
+
+try:
+    APP_VERSION = (BASE_DIR / '.version').read_text().strip()
+except OSError:
+    APP_VERSION = 'unknown'
+
+# Health check body only varies by timestamp, so encode the static prefix once
+HEALTH_RESPONSE_PREFIX = b'{"status":"healthy","version":' + orjson.dumps(APP_VERSION) + b',"timestamp":"'
+
+# Shared HTTP session so outbound calls reuse keep-alive connections.
+# Idempotent requests are retried once or twice on gateway errors only; connect
+# errors and read timeouts fail immediately so a hung upstream costs one timeout.
+# The last response is returned as-is so callers still see its status code.
+http_session = requests.Session()
+http_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=2, connect=0, read=False, backoff_factor=0.3,
+        status_forcelist=(502, 503, 504), raise_on_status=False,
+        respect_retry_after_header=False  # An upstream Retry-After: 120 must not park a worker thread
+    )
+)
+http_session.mount('https://', http_adapter)
+http_session.mount('http://', http_adapter)
+http_session.headers.update({'User-Agent': f'digital-signage/{APP_VERSION}'})
+
+# (connect, read) timeouts: fail fast on an unreachable host, allow slow responses
+HTTP_TIMEOUT = (3.05, 10)
+HTTP_TIMEOUT_SHORT = (3.05, 5)
+
+# Shared worker pool for blocking upstream lookups (flight routes, API tests).
+# Threads are only started on first submit, i.e. after gunicorn has forked.
+io_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='upstream')
+
+# OpenWeatherMap endpoints (query parameters are passed separately)
+OWM_ONECALL_URL = 'https://api.openweathermap.org/data/3.0/onecall'
+OWM_CURRENT_URL = 'https://api.openweathermap.org/data/2.5/weather'
+OWM_ONECALL_EXCLUDE = 'minutely,hourly,daily,alerts'
+
 # Cache for nearest flights API to prevent rate limiting
+# 'entry' is swapped as one (key, timestamp, data) tuple so readers never mix two fetches
 flights_cache = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 30  # Cache for 30 seconds
+    'entry': None,  # key: get_flights_cache_key() settings; data: serialized JSON body (bytes)
+    'ttl': 30,  # Cache for 30 seconds
+    'max_stale': 120,  # Serve stale data (while refreshing) for up to 2 minutes
+    'refreshing': False,
+    'fetch_lock': threading.Lock()  # Single-flight: one upstream fetch at a time
+}
+
+# Cache for weather API (OpenWeatherMap only updates every few minutes)
+weather_cache = {
+    'entry': None,  # (key, timestamp, data) with key = (lat, lon, api_key)
+    'ttl': 300,  # Cache for 5 minutes
+    'max_stale': 1800,  # Serve stale data (while refreshing) for up to 30 minutes
+    'refreshing': False,
+    'fetch_lock': threading.Lock()  # Single-flight: one upstream fetch at a time
+}
+cache_refresh_lock = threading.Lock()
+
+# In-process cache of the parsed dashboard config, invalidated when the file's mtime changes
+dashboard_config_cache = {
+    'mtime': None,
+    'data': None
+}
+dashboard_config_lock = threading.Lock()
+
+# Parsed flight routes cache, reused until the file's mtime changes (e.g. another worker saved it)
+flight_routes_memory_cache = {
+    'mtime': None,
+    'data': None
+}
+flight_routes_lock = threading.Lock()
+
+# Parsed Almaty timetable, reused across polls until the TTL expires or the query changes
+# 'entry' is swapped as one (key, timestamp, starts, lectures) tuple so readers never mix two fetches
+almaty_cache = {
+    'entry': None,  # starts: sorted lecture start times (for bisect); lectures: same order
+    'ttl': 600,  # Timetables rarely change, refresh every 10 minutes
+    'fetch_lock': threading.Lock()  # Single-flight: concurrent misses wait for one fetch
 }
 
 # Ensure directories exist
@@ -85,104 +196,203 @@ DEFAULT_DASHBOARD_CONFIG = {
 }
 
 
+# Specific aircraft type icons (exact matches from adsb_icons)
+AIRCRAFT_SPECIFIC_ICONS = {
+    # Airbus
+    'A320': 'a320', 'A19N': 'a320', 'A20N': 'a320', 'A21N': 'a320',
+    'A318': 'a320', 'A319': 'a320', 'A321': 'a320',
+    'A330': 'a330', 'A332': 'a330', 'A333': 'a330', 'A338': 'a330', 'A339': 'a330',
+    'A340': 'a340', 'A342': 'a340', 'A343': 'a340', 'A345': 'a340', 'A346': 'a340',
+    'A380': 'a380', 'A388': 'a380',
+    # Boeing
+    'B737': 'b737', 'B738': 'b737', 'B739': 'b737', 'B37M': 'b737', 'B38M': 'b737',
+    'B731': 'b737', 'B732': 'b737', 'B733': 'b737', 'B734': 'b737', 'B735': 'b737',
+    'B736': 'b737', 'B39M': 'b737', 'B3XM': 'b737',
+    'B747': 'b747', 'B741': 'b747', 'B742': 'b747', 'B743': 'b747', 'B744': 'b747',
+    'B748': 'b747', 'B74R': 'b747', 'B74S': 'b747',
+    'B767': 'b767', 'B762': 'b767', 'B763': 'b767', 'B764': 'b767',
+    'B777': 'b777', 'B772': 'b777', 'B773': 'b777', 'B77L': 'b777', 'B77W': 'b777',
+    'B787': 'b787', 'B788': 'b787', 'B789': 'b787', 'B78X': 'b787',
+    # Business jets
+    'LJ24': 'learjet', 'LJ25': 'learjet', 'LJ31': 'learjet', 'LJ35': 'learjet',
+    'LJ40': 'learjet', 'LJ45': 'learjet', 'LJ55': 'learjet', 'LJ60': 'learjet',
+    'GLF4': 'glf5', 'GLF5': 'glf5', 'GLF6': 'glf5', 'GLEX': 'glf5',
+    'G150': 'glf5', 'G200': 'glf5', 'G250': 'glf5', 'G280': 'glf5',
+    'G450': 'glf5', 'G500': 'glf5', 'G550': 'glf5', 'G650': 'glf5',
+    'FA7X': 'fa7x', 'FA8X': 'fa7x', 'FA10': 'fa7x', 'FA20': 'fa7x', 'FA50': 'fa7x',
+    # Regional jets
+    'CRJ1': 'crjx', 'CRJ2': 'crjx', 'CRJ7': 'crjx', 'CRJ9': 'crjx', 'CRJX': 'crjx',
+    'E170': 'erj', 'E175': 'erj', 'E75L': 'erj', 'E75S': 'erj',
+    'E190': 'e195', 'E195': 'e195', 'E19X': 'e195', 'E290': 'e195', 'E295': 'e195',
+    # Turboprops
+    'DH8A': 'dh8a', 'DH8B': 'dh8a', 'DH8C': 'dh8a', 'DH8D': 'dh8a',
+    'DHC6': 'dh8a', 'DHC7': 'dh8a', 'DHC8': 'dh8a',
+    'Q100': 'dh8a', 'Q200': 'dh8a', 'Q300': 'dh8a', 'Q400': 'dh8a',
+    # Other
+    'MD11': 'md11', 'DC10': 'md11',
+    'F100': 'f100', 'F70': 'f100',
+    'C130': 'c130',
+    'C152': 'cessna', 'C162': 'cessna', 'C172': 'cessna', 'C182': 'cessna',
+    'C206': 'cessna', 'C208': 'cessna', 'C210': 'cessna',
+    # Fighters (generic military icons)
+    'F5': 'f5', 'F11': 'f11', 'F15': 'f15',
+}
+
+# Category-based fallback type codes
+# Helicopters
+HELICOPTER_TYPES = frozenset({'H25B', 'H25C', 'H60', 'EC35', 'EC45', 'AS50', 'AS55', 'AS65', 'B06', 'B407', 'B412', 'B429', 'B505', 'R22', 'R44', 'R66', 'S76', 'EC30', 'EC55', 'EC75', 'H135', 'H145', 'H175', 'AW09', 'AW39', 'AW69', 'AW89', 'AW19', 'MD50', 'MD60', 'MD90'})
+# Widebody jets (twin-aisle)
+WIDEBODY_TYPES = frozenset({'A350', 'A359', 'A35K', 'A3ST', 'B752', 'B753', 'IL96', 'L101', 'AN124', 'AN225'})
+# Turboprops
+TURBOPROP_TYPES = frozenset({'AT43', 'AT44', 'AT45', 'AT46', 'AT72', 'AT73', 'AT75', 'AT76', 'E120', 'SF34', 'SH33', 'SH36', 'IL18', 'AN12', 'AN24', 'AN26', 'P3', 'BE20', 'PC12', 'TBM7', 'TBM8', 'TBM9'})
+# Business jets
+BUSINESS_JET_TYPES = frozenset({'C25A', 'C25B', 'C25C', 'C25M', 'C500', 'C510', 'C525', 'C550', 'C551', 'C56X', 'C650', 'C680', 'C700', 'C750', 'CL30', 'CL35', 'CL60', 'E35L', 'E50P', 'E55P', 'E545', 'E550', 'F2TH', 'F900', 'H25A', 'PC24', 'PRM1', 'BE40', 'BE9L'})
+# Piston / General Aviation
+GA_TYPES = frozenset({'P28A', 'P28B', 'P28R', 'P28T', 'PA28', 'PA31', 'PA34', 'PA44', 'PA46', 'SR20', 'SR22', 'BE58', 'BE36', 'BE95', 'C340', 'C402', 'C414', 'C421', 'P68', 'DA40', 'DA42', 'DA62', 'PA18', 'PA22', 'ULAC'})
+# Regional jets not matched by a specific icon
+REGIONAL_JET_TYPES = frozenset({'RJ70', 'RJ85', 'RJ1H'})
+
+# Flat ICAO type -> icon table, built once at import. Earlier entries win,
+# so specific icons take precedence over the category lists.
+AIRCRAFT_TYPE_ICONS = {}
+for _types, _icon in (
+    (HELICOPTER_TYPES, 'c0'),
+    (WIDEBODY_TYPES, 'a6'),
+    (TURBOPROP_TYPES, 'a1'),
+    (BUSINESS_JET_TYPES, 'a2'),
+    (GA_TYPES, 'cessna'),
+    (REGIONAL_JET_TYPES, 'a3'),
+):
+    for _code in _types:
+        AIRCRAFT_TYPE_ICONS.setdefault(_code, f"adsb_icons/{_icon}")
+AIRCRAFT_TYPE_ICONS.update({code: f"adsb_icons/{icon}" for code, icon in AIRCRAFT_SPECIFIC_ICONS.items()})
+del _types, _icon, _code
+
+# Prefix fallbacks for unlisted types: military (F/MIG/SU) and narrowbody
+# (Airbus/Boeing/Embraer). No key is a prefix of another, so the 3-, 2- and
+# 1-char slices can be checked in any order.
+AIRCRAFT_PREFIX_ICONS = {
+    'MIG': 'adsb_icons/b4', 'SU': 'adsb_icons/b4', 'F': 'adsb_icons/b4',
+    'A': 'adsb_icons/a5', 'B': 'adsb_icons/a5', 'E': 'adsb_icons/a5',
+}
+
+# Narrowbody families recognized anywhere in the type code
+NARROWBODY_MARKERS = ('MD8', 'DC9', 'C919', 'SU95')
+
+
 def get_aircraft_category(aircraft_type):
     """Map ICAO aircraft type code to icon filename (specific or category-based)"""
     if not aircraft_type:
         return 'adsb_icons/a0'
     
-    aircraft_type = aircraft_type.upper().strip()
-    
-    # Specific aircraft type icons (exact matches from adsb_icons)
-    specific_icons = {
-        # Airbus
-        'A320': 'a320', 'A19N': 'a320', 'A20N': 'a320', 'A21N': 'a320',
-        'A318': 'a320', 'A319': 'a320', 'A321': 'a320',
-        'A330': 'a330', 'A332': 'a330', 'A333': 'a330', 'A338': 'a330', 'A339': 'a330',
-        'A340': 'a340', 'A342': 'a340', 'A343': 'a340', 'A345': 'a340', 'A346': 'a340',
-        'A380': 'a380', 'A388': 'a380',
-        # Boeing
-        'B737': 'b737', 'B738': 'b737', 'B739': 'b737', 'B37M': 'b737', 'B38M': 'b737',
-        'B731': 'b737', 'B732': 'b737', 'B733': 'b737', 'B734': 'b737', 'B735': 'b737',
-        'B736': 'b737', 'B39M': 'b737', 'B3XM': 'b737',
-        'B747': 'b747', 'B741': 'b747', 'B742': 'b747', 'B743': 'b747', 'B744': 'b747',
-        'B748': 'b747', 'B74R': 'b747', 'B74S': 'b747',
-        'B767': 'b767', 'B762': 'b767', 'B763': 'b767', 'B764': 'b767',
-        'B777': 'b777', 'B772': 'b777', 'B773': 'b777', 'B77L': 'b777', 'B77W': 'b777',
-        'B787': 'b787', 'B788': 'b787', 'B789': 'b787', 'B78X': 'b787',
-        # Business jets
-        'LJ24': 'learjet', 'LJ25': 'learjet', 'LJ31': 'learjet', 'LJ35': 'learjet',
-        'LJ40': 'learjet', 'LJ45': 'learjet', 'LJ55': 'learjet', 'LJ60': 'learjet',
-        'GLF4': 'glf5', 'GLF5': 'glf5', 'GLF6': 'glf5', 'GLEX': 'glf5',
-        'G150': 'glf5', 'G200': 'glf5', 'G250': 'glf5', 'G280': 'glf5',
-        'G450': 'glf5', 'G500': 'glf5', 'G550': 'glf5', 'G650': 'glf5',
-        'FA7X': 'fa7x', 'FA8X': 'fa7x', 'FA10': 'fa7x', 'FA20': 'fa7x', 'FA50': 'fa7x',
-        # Regional jets
-        'CRJ1': 'crjx', 'CRJ2': 'crjx', 'CRJ7': 'crjx', 'CRJ9': 'crjx', 'CRJX': 'crjx',
-        'E170': 'erj', 'E175': 'erj', 'E75L': 'erj', 'E75S': 'erj',
-        'E190': 'e195', 'E195': 'e195', 'E19X': 'e195', 'E290': 'e195', 'E295': 'e195',
-        # Turboprops
-        'DH8A': 'dh8a', 'DH8B': 'dh8a', 'DH8C': 'dh8a', 'DH8D': 'dh8a',
-        'DHC6': 'dh8a', 'DHC7': 'dh8a', 'DHC8': 'dh8a',
-        'Q100': 'dh8a', 'Q200': 'dh8a', 'Q300': 'dh8a', 'Q400': 'dh8a',
-        # Other
-        'MD11': 'md11', 'DC10': 'md11',
-        'F100': 'f100', 'F70': 'f100',
-        'C130': 'c130',
-        'C152': 'cessna', 'C162': 'cessna', 'C172': 'cessna', 'C182': 'cessna',
-        'C206': 'cessna', 'C208': 'cessna', 'C210': 'cessna',
-        # Fighters (generic military icons)
-        'F5': 'f5', 'F11': 'f11', 'F15': 'f15',
-    }
+    return _lookup_aircraft_category(aircraft_type.upper().strip())
+
+
+@lru_cache(maxsize=4096)
+def _lookup_aircraft_category(aircraft_type):
+    """Resolve a normalized (upper-case, stripped) ICAO type code to its icon (memoized)"""
+    icon = (AIRCRAFT_TYPE_ICONS.get(aircraft_type)
+            or AIRCRAFT_PREFIX_ICONS.get(aircraft_type[:3])
+            or AIRCRAFT_PREFIX_ICONS.get(aircraft_type[:2])
+            or AIRCRAFT_PREFIX_ICONS.get(aircraft_type[:1]))
+    if icon:
+        return icon
     
-    if aircraft_type in specific_icons:
-        return f"adsb_icons/{specific_icons[aircraft_type]}"
-    
-    # Category-based fallback icons
-    # Helicopter
-    if aircraft_type in ['H25B', 'H25C', 'H60', 'EC35', 'EC45', 'AS50', 'AS55', 'AS65', 'B06', 'B407', 'B412', 'B429', 'B505', 'R22', 'R44', 'R66', 'S76', 'EC30', 'EC55', 'EC75', 'H135', 'H145', 'H175', 'AW09', 'AW39', 'AW69', 'AW89', 'AW19', 'MD50', 'MD60', 'MD90']:
-        return 'adsb_icons/c0'  # Helicopter category
-    
-    # Widebody jets (twin-aisle)
-    if aircraft_type in ['A350', 'A359', 'A35K', 'A3ST', 'B752', 'B753', 'IL96', 'L101', 'AN124', 'AN225']:
-        return 'adsb_icons/a6'  # Widebody category
-    
-    # Turboprop
-    if aircraft_type in ['AT43', 'AT44', 'AT45', 'AT46', 'AT72', 'AT73', 'AT75', 'AT76', 'E120', 'SF34', 'SH33', 'SH36', 'IL18', 'AN12', 'AN24', 'AN26', 'P3', 'BE20', 'PC12', 'TBM7', 'TBM8', 'TBM9']:
-        return 'adsb_icons/a1'  # Turboprop category
+    if any(marker in aircraft_type for marker in NARROWBODY_MARKERS):
+        return 'adsb_icons/a5'  # Narrowbody category
     
-    # Business jets
-    if aircraft_type in ['C25A', 'C25B', 'C25C', 'C25M', 'C500', 'C510', 'C525', 'C550', 'C551', 'C56X', 'C650', 'C680', 'C700', 'C750', 'CL30', 'CL35', 'CL60', 'E35L', 'E50P', 'E55P', 'E545', 'E550', 'F2TH', 'F900', 'H25A', 'PC24', 'PRM1', 'BE40', 'BE9L']:
-        return 'adsb_icons/a2'  # Business jet category
+    # Default fallback
+    return 'adsb_icons/a0'
+
+
+def refresh_cache_in_background(cache, refresh):
+    """Run refresh() in a daemon thread unless a refresh of this cache is already running"""
+    with cache_refresh_lock:
+        if cache['refreshing']:
+            return
+        cache['refreshing'] = True
     
-    # Piston / General Aviation
-    if aircraft_type in ['P28A', 'P28B', 'P28R', 'P28T', 'PA28', 'PA31', 'PA34', 'PA44', 'PA46', 'SR20', 'SR22', 'BE58', 'BE36', 'BE95', 'C340', 'C402', 'C414', 'C421', 'P68', 'DA40', 'DA42', 'DA62', 'PA18', 'PA22', 'ULAC']:
-        return 'adsb_icons/cessna'  # GA category
+    def run():
+        try:
+            with app.app_context(), cache['fetch_lock']:
+                refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing cache in background: {e}")
+        finally:
+            cache['refreshing'] = False
     
-    # Regional jets not matched above
-    if aircraft_type in ['RJ70', 'RJ85', 'RJ1H']:
-        return 'adsb_icons/a3'  # Regional jet category
+    threading.Thread(target=run, daemon=True).start()
+
+
+def make_distance_km(lat, lon):
+    """Return a function giving the great-circle distance in km from (lat, lon) (Haversine formula).
     
-    # Military jets
-    if aircraft_type.startswith('F') or aircraft_type.startswith('MIG') or aircraft_type.startswith('SU'):
-        return 'adsb_icons/b4'  # Military category
+    The origin's radians and cosine are computed once, so per-aircraft calls only do the target's trig.
+    """
+    lat1 = math.radians(lat)
+    lon1 = math.radians(lon)
+    cos_lat1 = math.cos(lat1)
     
-    # Narrowbody jets (default for commercial aircraft)
-    if aircraft_type.startswith('A') or aircraft_type.startswith('B') or aircraft_type.startswith('E') or 'MD8' in aircraft_type or 'DC9' in aircraft_type or 'C919' in aircraft_type or 'SU95' in aircraft_type:
-        return 'adsb_icons/a5'  # Narrowbody category
+    def distance_km(lat2, lon2):
+        lat2 = math.radians(lat2)
+        dlat = lat2 - lat1
+        dlon = math.radians(lon2) - lon1
+        a = math.sin(dlat / 2) ** 2 + cos_lat1 * math.cos(lat2) * math.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
     
-    # Default fallback
-    return 'adsb_icons/a0'
+    return distance_km
+
+
+def bbox_from_radius(lat, lon, radius_km):
+    """Approximate bounding box (lat_min, lat_max, lon_min, lon_max) around (lat, lon)"""
+    # 1 degree latitude ≈ 111 km, 1 degree longitude ≈ 111 km * cos(latitude)
+    lat_delta = radius_km / 111.0
+    lon_delta = radius_km / (111.0 * math.cos(math.radians(lat)))
+    return lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
+
+
+def nearest_flights_response(flights, limit):
+    """JSON response with the `limit` nearest flights (partial selection, no full sort)"""
+    nearest = heapq.nsmallest(limit, flights, key=itemgetter('distance'))
+    return jsonify({'success': True, 'flights': nearest})
+
+
+def write_file_atomic(path, data, mode=None):
+    """Write bytes to a temp file and rename it over path, so readers never see a partial file"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        # Create the temp file with its final permissions; gunicorn runs with umask 0,
+        # so a plain open() would leave it world-readable until a later chmod
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode if mode is not None else 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
 
 def load_dashboard_config():
-    """Load dashboard configuration from file or create default"""
-    if DASHBOARD_CONFIG_FILE.exists():
+    """Load dashboard configuration from file or create default (cached until the file changes)"""
+    try:
+        mtime = DASHBOARD_CONFIG_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return copy.deepcopy(DEFAULT_DASHBOARD_CONFIG)
+    
+    with dashboard_config_lock:
+        if dashboard_config_cache['mtime'] == mtime:
+            return dashboard_config_cache['data']
+        
         try:
-            with open(DASHBOARD_CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        except Exception as e:
+            with open(DASHBOARD_CONFIG_FILE, 'rb') as f:
+                config = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError) as e:
             logger.error(f"Error loading dashboard config: {e}")
-    return DEFAULT_DASHBOARD_CONFIG.copy()
+            return copy.deepcopy(DEFAULT_DASHBOARD_CONFIG)
+        
+        dashboard_config_cache['mtime'] = mtime
+        dashboard_config_cache['data'] = config
+        return config
 
 
 def save_dashboard_config(config):
@@ -191,8 +401,12 @@ def save_dashboard_config(config):
         # Add/update last_modified timestamp
         config['last_modified'] = datetime.now().isoformat()
         
-        with open(DASHBOARD_CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
+        write_file_atomic(DASHBOARD_CONFIG_FILE, orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        
+        # Prime the cache with what we just wrote instead of re-reading it
+        with dashboard_config_lock:
+            dashboard_config_cache['mtime'] = DASHBOARD_CONFIG_FILE.stat().st_mtime_ns
+            dashboard_config_cache['data'] = config
         return True
     except Exception as e:
         logger.error(f"Error saving dashboard config: {e}")
@@ -207,12 +421,13 @@ def hash_password(password):
 
 def load_admin_credentials():
     """Load admin credentials from file or create default"""
-    if AUTH_FILE.exists():
-        try:
-            with open(AUTH_FILE, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading admin credentials: {e}")
+    try:
+        with open(AUTH_FILE, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        pass
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.error(f"Error loading admin credentials: {e}")
     
     # Create default credentials: username='admin', password='admin'
     default_creds = {
@@ -227,9 +442,7 @@ def load_admin_credentials():
 def save_admin_credentials(credentials):
     """Save admin credentials to file"""
     try:
-        with open(AUTH_FILE, 'w') as f:
-            json.dump(credentials, f, indent=2)
-        os.chmod(AUTH_FILE, 0o600)  # Secure file permissions
+        write_file_atomic(AUTH_FILE, orjson.dumps(credentials, option=orjson.OPT_INDENT_2), mode=0o600)
         return True
     except Exception as e:
         logger.error(f"Error saving admin credentials: {e}")
@@ -257,23 +470,78 @@ def login_required(f):
     return decorated_function
 
 
+def conditional_response(f):
+    """Decorator adding an ETag to successful responses and answering 304 when the client already has it"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        etag, _ = response.get_etag()
+        # nginx weakens the ETag (W/"...") when it gzips the body, so compare weakly
+        if request.if_none_match.contains_weak(etag):
+            return app.response_class(status=304, headers={'ETag': response.headers['ETag'], 'Cache-Control': 'no-cache'})
+        return response
+    return decorated_function
+
+
+def backfill_route_timestamps(cache):
+    """Derive last_seen_ts from the ISO last_seen string where it is missing or disagrees.
+    
+    last_seen stays the authoritative (hand-editable) field: entries written before
+    last_seen_ts existed or whose last_seen was edited by hand get a fresh epoch copy,
+    so age checks on the request path never have to parse dates.
+    """
+    for route in cache.values():
+        if not isinstance(route, dict) or 'last_seen' not in route:
+            continue
+        try:
+            last_seen_ts = datetime.fromisoformat(route['last_seen']).timestamp()
+        except (TypeError, ValueError):
+            continue
+        # Allow for the sub-second gap between the two clocks read by update_route_cache
+        if abs(route.get('last_seen_ts', float('-inf')) - last_seen_ts) >= 1:
+            route['last_seen_ts'] = last_seen_ts
+
+
 def load_flight_routes_cache():
-    """Load flight routes cache from file"""
-    if FLIGHT_ROUTES_CACHE_FILE.exists():
+    """Load flight routes cache from file (cached in-process until the file changes)"""
+    try:
+        mtime = FLIGHT_ROUTES_CACHE_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    
+    with flight_routes_lock:
+        if flight_routes_memory_cache['mtime'] == mtime:
+            return flight_routes_memory_cache['data']
+        
         try:
-            with open(FLIGHT_ROUTES_CACHE_FILE, 'r') as f:
-                return json.load(f)
-        except Exception as e:
+            with open(FLIGHT_ROUTES_CACHE_FILE, 'rb') as f:
+                cache = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError) as e:
             logger.error(f"Error loading flight routes cache: {e}")
             return {}
-    return {}
+        
+        backfill_route_timestamps(cache)
+        flight_routes_memory_cache['mtime'] = mtime
+        flight_routes_memory_cache['data'] = cache
+        return cache
 
 
 def save_flight_routes_cache(cache):
     """Save flight routes cache to file"""
     try:
-        with open(FLIGHT_ROUTES_CACHE_FILE, 'w') as f:
-            json.dump(cache, f, indent=2)
+        # Serialize writers so the recorded mtime always belongs to the data we wrote
+        with flight_routes_lock:
+            write_file_atomic(FLIGHT_ROUTES_CACHE_FILE, orjson.dumps(cache, option=orjson.OPT_INDENT_2))
+            
+            # Remember our own write so the next load doesn't re-read it
+            backfill_route_timestamps(cache)
+            flight_routes_memory_cache['mtime'] = FLIGHT_ROUTES_CACHE_FILE.stat().st_mtime_ns
+            flight_routes_memory_cache['data'] = cache
         return True
     except Exception as e:
         logger.error(f"Error saving flight routes cache: {e}")
@@ -287,9 +555,90 @@ TRIAS_NAMESPACES = {
     'siri': 'http://www.siri.org.uk/siri'
 }
 
+# Fully-qualified TRIAS tag names and paths, resolved once instead of on every find()
+TRIAS_NS = '{%s}' % TRIAS_NAMESPACES['trias']
+TRIAS_TAG_LOCATION = TRIAS_NS + 'Location'
+TRIAS_TAG_STOP_POINT = TRIAS_NS + 'StopPoint'
+TRIAS_TAG_STOP_PLACE = TRIAS_NS + 'StopPlace'
+TRIAS_TAG_STOP_POINT_REF = TRIAS_NS + 'StopPointRef'
+TRIAS_TAG_STOP_PLACE_REF = TRIAS_NS + 'StopPlaceRef'
+TRIAS_TAG_GEO_POSITION = TRIAS_NS + 'GeoPosition'
+TRIAS_TAG_LONGITUDE = TRIAS_NS + 'Longitude'
+TRIAS_TAG_LATITUDE = TRIAS_NS + 'Latitude'
+TRIAS_TAG_STOP_EVENT = TRIAS_NS + 'StopEvent'
+TRIAS_PATH_STOP_POINT_NAME = f'{TRIAS_NS}StopPointName/{TRIAS_NS}Text'
+TRIAS_PATH_STOP_PLACE_NAME = f'{TRIAS_NS}StopPlaceName/{TRIAS_NS}Text'
+TRIAS_PATH_LINE_NAME = f'.//{TRIAS_NS}PublishedLineName/{TRIAS_NS}Text'
+TRIAS_PATH_DESTINATION = f'.//{TRIAS_NS}DestinationText/{TRIAS_NS}Text'
+TRIAS_PATH_MODE = f'.//{TRIAS_NS}Mode/{TRIAS_NS}PtMode'
+TRIAS_PATH_TIMETABLED_TIME = f'.//{TRIAS_NS}TimetabledTime'
+TRIAS_PATH_ESTIMATED_TIME = f'.//{TRIAS_NS}EstimatedTime'
+
+# TRIAS request bodies, filled in with str.format (escape text values with xml_escape)
+TRIAS_REQUEST_HEADER = '''<?xml version="1.0" encoding="UTF-8"?>
+<Trias xmlns="http://www.vdv.de/trias" xmlns:siri="http://www.siri.org.uk/siri" version="1.2">
+    <ServiceRequest>
+        <siri:RequestTimestamp>{timestamp}</siri:RequestTimestamp>
+        <siri:RequestorRef>digital_signage</siri:RequestorRef>
+        <RequestPayload>
+'''
+TRIAS_REQUEST_FOOTER = '''
+        </RequestPayload>
+    </ServiceRequest>
+</Trias>'''
+
+TRIAS_STOP_NAME_REQUEST = TRIAS_REQUEST_HEADER + '''            <LocationInformationRequest>
+                <InitialInput>
+                    <LocationName>
+                        <Text>{query}</Text>
+                        <Language>de</Language>
+                    </LocationName>
+                </InitialInput>
+                <Restrictions>
+                    <Type>stop</Type>
+                    <NumberOfResults>{limit}</NumberOfResults>
+                </Restrictions>
+            </LocationInformationRequest>''' + TRIAS_REQUEST_FOOTER
+
+TRIAS_STOP_COORDINATES_REQUEST = TRIAS_REQUEST_HEADER + '''            <LocationInformationRequest>
+                <InitialInput>
+                    <GeoPosition>
+                        <Longitude>{longitude}</Longitude>
+                        <Latitude>{latitude}</Latitude>
+                    </GeoPosition>
+                </InitialInput>
+                <Restrictions>
+                    <Type>stop</Type>
+                    <NumberOfResults>{limit}</NumberOfResults>
+                </Restrictions>
+            </LocationInformationRequest>''' + TRIAS_REQUEST_FOOTER
+
+TRIAS_DEPARTURES_REQUEST = TRIAS_REQUEST_HEADER + '''            <StopEventRequest>
+                <Location>
+                    <LocationRef>
+                        <StopPointRef>{stop_id}</StopPointRef>
+                    </LocationRef>
+                </Location>
+                <Params>
+                    <NumberOfResults>{limit}</NumberOfResults>
+                    <StopEventType>departure</StopEventType>
+                    <IncludeRealtimeData>true</IncludeRealtimeData>
+                </Params>
+                <DepartureWindow>60</DepartureWindow>
+            </StopEventRequest>''' + TRIAS_REQUEST_FOOTER
+
+# (epoch second, formatted string) of the last TRIAS timestamp, swapped as one tuple
+_trias_timestamp = (0, '')
+
 def get_trias_timestamp():
-    """Get current UTC timestamp in TRIAS format"""
-    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+    """Get current UTC timestamp in TRIAS format (formatted at most once per second)"""
+    global _trias_timestamp
+    now = int(time.time())
+    second, formatted = _trias_timestamp
+    if now != second:
+        formatted = datetime.fromtimestamp(now, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        _trias_timestamp = (now, formatted)
+    return formatted
 
 def search_trias_stops(query, limit=20):
     """Search for transit stops using TRIAS API with coordinate-based fallback"""
@@ -317,52 +666,19 @@ def search_trias_stops(query, limit=20):
 
 def _search_trias_by_coordinates(longitude, latitude, name_filter=None, radius=5000, limit=20):
     """Search for transit stops near coordinates using TRIAS API"""
-    # Register namespace prefixes for proper output
-    ET.register_namespace('', TRIAS_NAMESPACES['trias'])
-    ET.register_namespace('siri', TRIAS_NAMESPACES['siri'])
-    
-    # Build XML using ElementTree for proper encoding
-    trias = ET.Element('Trias', {
-        'xmlns': TRIAS_NAMESPACES['trias'],
-        'version': '1.2'
-    })
-    
-    service_request = ET.SubElement(trias, 'ServiceRequest')
-    
-    timestamp = ET.SubElement(service_request, '{%s}RequestTimestamp' % TRIAS_NAMESPACES['siri'])
-    timestamp.text = get_trias_timestamp()
-    
-    requestor_ref = ET.SubElement(service_request, '{%s}RequestorRef' % TRIAS_NAMESPACES['siri'])
-    requestor_ref.text = 'digital_signage'
-    
-    request_payload = ET.SubElement(service_request, 'RequestPayload')
-    loc_info_req = ET.SubElement(request_payload, 'LocationInformationRequest')
-    
-    # Use InitialInput with GeoPosition
-    initial_input = ET.SubElement(loc_info_req, 'InitialInput')
-    geo_position = ET.SubElement(initial_input, 'GeoPosition')
-    lon_elem = ET.SubElement(geo_position, 'Longitude')
-    lon_elem.text = str(longitude)
-    lat_elem = ET.SubElement(geo_position, 'Latitude')
-    lat_elem.text = str(latitude)
-    
-    restrictions = ET.SubElement(loc_info_req, 'Restrictions')
-    type_elem = ET.SubElement(restrictions, 'Type')
-    type_elem.text = 'stop'
-    num_results = ET.SubElement(restrictions, 'NumberOfResults')
-    num_results.text = str(limit * 3)  # Get more results to filter by name
-    
-    # Convert to string
-    xml_string = ET.tostring(trias, encoding='utf-8', method='xml')
-    xml_declaration = b'<?xml version="1.0" encoding="UTF-8"?>\n'
-    xml_request = (xml_declaration + xml_string).decode('utf-8')
+    xml_request = TRIAS_STOP_COORDINATES_REQUEST.format(
+        timestamp=get_trias_timestamp(),
+        longitude=xml_escape(str(longitude)),  # From the hand-editable dashboard config
+        latitude=xml_escape(str(latitude)),
+        limit=limit * 3  # Get more results to filter by name
+    )
     
     try:
-        response = requests.post(
+        response = http_session.post(
             TRIAS_API_URL,
             data=xml_request.encode('utf-8'),
             headers={'Content-Type': 'text/xml; charset=utf-8'},
-            timeout=10
+            timeout=HTTP_TIMEOUT
         )
         response.raise_for_status()
         
@@ -373,40 +689,40 @@ def _search_trias_by_coordinates(longitude, latitude, name_filter=None, radius=5
         stops_dict = {}  # Use dict to group by stop name
         
         # Count locations found
-        locations = root.findall('.//trias:Location', TRIAS_NAMESPACES)
+        locations = list(root.iter(TRIAS_TAG_LOCATION))
         logger.info(f"Found {len(locations)} Location elements in coordinate search")
         
         for location in locations:
             # Try to find StopPoint first, then StopPlace
-            stop_point = location.find('trias:StopPoint', TRIAS_NAMESPACES)
-            stop_place = location.find('trias:StopPlace', TRIAS_NAMESPACES)
+            stop_point = location.find(TRIAS_TAG_STOP_POINT)
+            stop_place = location.find(TRIAS_TAG_STOP_PLACE)
             
             stop_ref = None
             stop_name = None
             
             if stop_point is not None:
-                stop_point_ref = stop_point.find('trias:StopPointRef', TRIAS_NAMESPACES)
+                stop_point_ref = stop_point.find(TRIAS_TAG_STOP_POINT_REF)
                 if stop_point_ref is None:
                     continue
                 stop_ref = stop_point_ref.text
-                stop_point_name = stop_point.find('trias:StopPointName/trias:Text', TRIAS_NAMESPACES)
+                stop_point_name = stop_point.find(TRIAS_PATH_STOP_POINT_NAME)
                 stop_name = stop_point_name.text if stop_point_name is not None else None
                 
             elif stop_place is not None:
-                stop_place_ref = stop_place.find('trias:StopPlaceRef', TRIAS_NAMESPACES)
+                stop_place_ref = stop_place.find(TRIAS_TAG_STOP_PLACE_REF)
                 if stop_place_ref is None:
                     continue
                 stop_ref = stop_place_ref.text
-                stop_place_name = stop_place.find('trias:StopPlaceName/trias:Text', TRIAS_NAMESPACES)
+                stop_place_name = stop_place.find(TRIAS_PATH_STOP_PLACE_NAME)
                 stop_name = stop_place_name.text if stop_place_name is not None else None
             
             # Get coordinates
-            geo_position = location.find('trias:GeoPosition', TRIAS_NAMESPACES)
+            geo_position = location.find(TRIAS_TAG_GEO_POSITION)
             longitude = None
             latitude = None
             if geo_position is not None:
-                lon_elem = geo_position.find('trias:Longitude', TRIAS_NAMESPACES)
-                lat_elem = geo_position.find('trias:Latitude', TRIAS_NAMESPACES)
+                lon_elem = geo_position.find(TRIAS_TAG_LONGITUDE)
+                lat_elem = geo_position.find(TRIAS_TAG_LATITUDE)
                 longitude = float(lon_elem.text) if lon_elem is not None else None
                 latitude = float(lat_elem.text) if lat_elem is not None else None
             
@@ -446,112 +762,79 @@ def _search_trias_by_coordinates(longitude, latitude, name_filter=None, radius=5
 
 def _search_trias_api(query, limit=20):
     """Search for transit stops using TRIAS API by name"""
-    # Register namespace prefixes for proper output
-    ET.register_namespace('', TRIAS_NAMESPACES['trias'])
-    ET.register_namespace('siri', TRIAS_NAMESPACES['siri'])
-    
-    # Build XML using ElementTree for proper encoding
-    trias = ET.Element('Trias', {
-        'xmlns': TRIAS_NAMESPACES['trias'],
-        'version': '1.2'
-    })
-    
-    service_request = ET.SubElement(trias, 'ServiceRequest')
-    
-    timestamp = ET.SubElement(service_request, '{%s}RequestTimestamp' % TRIAS_NAMESPACES['siri'])
-    timestamp.text = get_trias_timestamp()
-    
-    requestor_ref = ET.SubElement(service_request, '{%s}RequestorRef' % TRIAS_NAMESPACES['siri'])
-    requestor_ref.text = 'digital_signage'
-    
-    request_payload = ET.SubElement(service_request, 'RequestPayload')
-    loc_info_req = ET.SubElement(request_payload, 'LocationInformationRequest')
-    
-    initial_input = ET.SubElement(loc_info_req, 'InitialInput')
-    location_name = ET.SubElement(initial_input, 'LocationName')
-    text = ET.SubElement(location_name, 'Text')
-    text.text = query
-    language = ET.SubElement(location_name, 'Language')
-    language.text = 'de'
-    
-    restrictions = ET.SubElement(loc_info_req, 'Restrictions')
-    type_elem = ET.SubElement(restrictions, 'Type')
-    type_elem.text = 'stop'
-    num_results = ET.SubElement(restrictions, 'NumberOfResults')
-    num_results.text = str(limit * 2)
-    
-    # Convert to string
-    xml_string = ET.tostring(trias, encoding='utf-8', method='xml')
-    xml_declaration = b'<?xml version="1.0" encoding="UTF-8"?>\n'
-    xml_request = (xml_declaration + xml_string).decode('utf-8')
+    xml_request = TRIAS_STOP_NAME_REQUEST.format(
+        timestamp=get_trias_timestamp(),
+        query=xml_escape(query),
+        limit=limit * 2
+    )
     
     # Log the actual XML request being sent
-    logger.info(f"TRIAS XML Request:\n{xml_request}")
+    logger.debug("TRIAS XML Request:\n%s", xml_request)
     
     try:
-        response = requests.post(
+        response = http_session.post(
             TRIAS_API_URL,
             data=xml_request.encode('utf-8'),
             headers={'Content-Type': 'text/xml; charset=utf-8'},
-            timeout=10
+            timeout=HTTP_TIMEOUT
         )
         response.raise_for_status()
         
         # Log the raw response for debugging
         logger.info(f"TRIAS search for '{query}' - Response status: {response.status_code}")
         
-        # Save response to file for debugging
-        import hashlib
-        query_hash = hashlib.md5(query.encode()).hexdigest()[:8]
-        debug_file = f"/tmp/trias_response_{query_hash}.xml"
-        try:
-            with open(debug_file, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            logger.info(f"Response saved to {debug_file} (query: '{query}')")
-        except Exception as e:
-            logger.error(f"Failed to save response: {e}")
+        # Save response to file for debugging (only when debug logging is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            query_hash = hashlib.md5(query.encode()).hexdigest()[:8]
+            debug_file = f"/tmp/trias_response_{query_hash}.xml"
+            try:
+                with open(debug_file, 'wb') as f:
+                    f.write(response.content)
+                logger.debug("Response saved to %s (query: '%s')", debug_file, query)
+            except OSError as e:
+                logger.error(f"Failed to save response: {e}")
         
         # Parse XML response
         root = ET.fromstring(response.content)
         stops_dict = {}  # Use dict to group by stop name
         
         # Count locations found
-        locations = root.findall('.//trias:Location', TRIAS_NAMESPACES)
+        locations = list(root.iter(TRIAS_TAG_LOCATION))
         logger.info(f"Found {len(locations)} Location elements in response")
         
-        for location in root.findall('.//trias:Location', TRIAS_NAMESPACES):
+        for location in locations:
             # Try to find StopPoint first, then StopPlace
-            stop_point = location.find('trias:StopPoint', TRIAS_NAMESPACES)
-            stop_place = location.find('trias:StopPlace', TRIAS_NAMESPACES)
+            stop_point = location.find(TRIAS_TAG_STOP_POINT)
+            stop_place = location.find(TRIAS_TAG_STOP_PLACE)
             
             stop_ref = None
             stop_name = None
             
             if stop_point is not None:
                 # This is a StopPoint (individual platform/stop)
-                stop_point_ref = stop_point.find('trias:StopPointRef', TRIAS_NAMESPACES)
+                stop_point_ref = stop_point.find(TRIAS_TAG_STOP_POINT_REF)
                 if stop_point_ref is None:
                     continue
                 stop_ref = stop_point_ref.text
-                stop_point_name = stop_point.find('trias:StopPointName/trias:Text', TRIAS_NAMESPACES)
+                stop_point_name = stop_point.find(TRIAS_PATH_STOP_POINT_NAME)
                 stop_name = stop_point_name.text if stop_point_name is not None else None
                 
             elif stop_place is not None:
                 # This is a StopPlace (stop area/group of platforms)
-                stop_place_ref = stop_place.find('trias:StopPlaceRef', TRIAS_NAMESPACES)
+                stop_place_ref = stop_place.find(TRIAS_TAG_STOP_PLACE_REF)
                 if stop_place_ref is None:
                     continue
                 stop_ref = stop_place_ref.text
-                stop_place_name = stop_place.find('trias:StopPlaceName/trias:Text', TRIAS_NAMESPACES)
+                stop_place_name = stop_place.find(TRIAS_PATH_STOP_PLACE_NAME)
                 stop_name = stop_place_name.text if stop_place_name is not None else None
             
             # Get coordinates
-            geo_position = location.find('trias:GeoPosition', TRIAS_NAMESPACES)
+            geo_position = location.find(TRIAS_TAG_GEO_POSITION)
             longitude = None
             latitude = None
             if geo_position is not None:
-                lon_elem = geo_position.find('trias:Longitude', TRIAS_NAMESPACES)
-                lat_elem = geo_position.find('trias:Latitude', TRIAS_NAMESPACES)
+                lon_elem = geo_position.find(TRIAS_TAG_LONGITUDE)
+                lat_elem = geo_position.find(TRIAS_TAG_LATITUDE)
                 longitude = float(lon_elem.text) if lon_elem is not None else None
                 latitude = float(lat_elem.text) if lat_elem is not None else None
             
@@ -588,35 +871,18 @@ def _search_trias_api(query, limit=20):
 
 def get_trias_departures(stop_id, limit=10):
     """Get departures for a stop using TRIAS API"""
-    xml_request = f'''<?xml version="1.0" encoding="UTF-8"?>
-<Trias xmlns="http://www.vdv.de/trias" xmlns:siri="http://www.siri.org.uk/siri" version="1.2">
-    <ServiceRequest>
-        <siri:RequestTimestamp>{get_trias_timestamp()}</siri:RequestTimestamp>
-        <siri:RequestorRef>digital_signage</siri:RequestorRef>
-        <RequestPayload>
-            <StopEventRequest>
-                <Location>
-                    <LocationRef>
-                        <StopPointRef>{stop_id}</StopPointRef>
-                    </LocationRef>
-                </Location>
-                <Params>
-                    <NumberOfResults>{limit}</NumberOfResults>
-                    <StopEventType>departure</StopEventType>
-                    <IncludeRealtimeData>true</IncludeRealtimeData>
-                </Params>
-                <DepartureWindow>60</DepartureWindow>
-            </StopEventRequest>
-        </RequestPayload>
-    </ServiceRequest>
-</Trias>'''
+    xml_request = TRIAS_DEPARTURES_REQUEST.format(
+        timestamp=get_trias_timestamp(),
+        stop_id=xml_escape(stop_id),
+        limit=limit
+    )
     
     try:
-        response = requests.post(
+        response = http_session.post(
             TRIAS_API_URL,
             data=xml_request.encode('utf-8'),
             headers={'Content-Type': 'text/xml'},
-            timeout=10
+            timeout=HTTP_TIMEOUT
         )
         response.raise_for_status()
         
@@ -624,12 +890,12 @@ def get_trias_departures(stop_id, limit=10):
         root = ET.fromstring(response.content)
         departures = []
         
-        for stop_event in root.findall('.//trias:StopEvent', TRIAS_NAMESPACES):
-            line_elem = stop_event.find('.//trias:PublishedLineName/trias:Text', TRIAS_NAMESPACES)
-            dest_elem = stop_event.find('.//trias:DestinationText/trias:Text', TRIAS_NAMESPACES)
-            mode_elem = stop_event.find('.//trias:Mode/trias:PtMode', TRIAS_NAMESPACES)
-            timetabled_elem = stop_event.find('.//trias:TimetabledTime', TRIAS_NAMESPACES)
-            estimated_elem = stop_event.find('.//trias:EstimatedTime', TRIAS_NAMESPACES)
+        for stop_event in root.iter(TRIAS_TAG_STOP_EVENT):
+            line_elem = stop_event.find(TRIAS_PATH_LINE_NAME)
+            dest_elem = stop_event.find(TRIAS_PATH_DESTINATION)
+            mode_elem = stop_event.find(TRIAS_PATH_MODE)
+            timetabled_elem = stop_event.find(TRIAS_PATH_TIMETABLED_TIME)
+            estimated_elem = stop_event.find(TRIAS_PATH_ESTIMATED_TIME)
             
             # Use estimated time if available, otherwise timetabled
             departure_time = estimated_elem.text if estimated_elem is not None else (timetabled_elem.text if timetabled_elem is not None else None)
@@ -641,12 +907,16 @@ def get_trias_departures(stop_id, limit=10):
             if departure_time:
                 # Parse ISO timestamp and convert from UTC to local time (Europe/Vienna)
                 try:
-                    dt_utc = datetime.fromisoformat(departure_time.replace('Z', '+00:00'))
-                    dt_local = dt_utc.astimezone(ZoneInfo('Europe/Vienna'))
-                    time_str = dt_local.strftime('%H:%M')
+                    if departure_time.endswith('Z'):
+                        # fromisoformat only accepts a 'Z' suffix from Python 3.11 on
+                        dt_utc = datetime.fromisoformat(departure_time[:-1]).replace(tzinfo=timezone.utc)
+                    else:
+                        dt_utc = datetime.fromisoformat(departure_time)
+                    dt_local = dt_utc.astimezone(LOCAL_TZ)
+                    time_str = f"{dt_local.hour:02d}:{dt_local.minute:02d}"
                     # Convert to ISO for JavaScript with local timezone
                     timestamp_local = dt_local.isoformat()
-                except Exception as e:
+                except ValueError as e:
                     logger.error(f"Error parsing time {departure_time}: {e}")
                     time_str = departure_time
                     timestamp_local = departure_time
@@ -666,11 +936,28 @@ def get_trias_departures(stop_id, limit=10):
         return []
 
 
-def get_almaty_lectures(cohort, max_items=5, time_window_hours=24):
-    """Get upcoming lectures from FH JOANNEUM Almaty timetable API"""
+def almaty_entry_is_fresh(entry, cache_key):
+    """Whether a cached (key, timestamp, starts, lectures) timetable entry can serve cache_key"""
+    return (entry is not None and entry[0] == cache_key and
+            time.time() - entry[1] < almaty_cache['ttl'])
+
+
+def load_almaty_entry(cache_key, cohorts_to_query, start_date, end_date):
+    """Fetch and parse the timetable into a (key, timestamp, starts, lectures) entry (None on failure)"""
+    lectures = fetch_almaty_lectures(cohorts_to_query, start_date, end_date)
+    if lectures is None:
+        return None
+    return (cache_key, time.time(), [start for start, _ in lectures], [lecture for _, lecture in lectures])
+
+
+def get_almaty_lectures(cohort, max_items=5, time_window_hours=24, use_cache=True):
+    """Get upcoming lectures from FH JOANNEUM Almaty timetable API
+    
+    use_cache=False always fetches and leaves the shared cache untouched (used by the admin test).
+    """
     try:
         # Build date range: today to 14 days ahead
-        now = datetime.now(ZoneInfo('Europe/Vienna'))
+        now = datetime.now(LOCAL_TZ)
         start_date = now.strftime('%Y-%m-%d')
         end_date = (now.replace(hour=0, minute=0, second=0, microsecond=0) + 
                     timedelta(days=14)).strftime('%Y-%m-%d')
@@ -684,14 +971,7 @@ def get_almaty_lectures(cohort, max_items=5, time_window_hours=24):
             cohorts_to_query = [cohort]
         else:
             # Calculate valid year groups based on current academic year
-            current_year = now.year
-            current_month = now.month
-            
-            # Determine academic year start (October = month 10)
-            if current_month >= 10:
-                academic_year = current_year
-            else:
-                academic_year = current_year - 1
+            academic_year = get_academic_year(now)
             
             # Generate all valid cohorts for this academic year
             # Format for API: "LAV 2023", "MAV 2025" (with space and full year)
@@ -702,115 +982,151 @@ def get_almaty_lectures(cohort, max_items=5, time_window_hours=24):
                 f"MAV {academic_year}"       # Master MAV
             ]
         
-        # Fetch lectures for all cohorts
-        all_events = []
-        url = 'https://almaty.fh-joanneum.at/stundenplan/json.php'
-        
-        for query_cohort in cohorts_to_query:
-            try:
-                params = {
-                    'q': query_cohort,
-                    'start': start_date,
-                    'end': end_date
-                }
-                
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
-                
-                events = response.json()
-                if isinstance(events, list):
-                    all_events.extend(events)
-            except Exception as e:
-                logger.warning(f"Error fetching lectures for cohort {query_cohort}: {e}")
-                continue
-        
-        events = all_events
-        
-        # Filter and process events
-        lectures = []
-        for event in events:
-            try:
-                # Parse start time (ISO format)
-                start_str = event.get('start', '')
-                if not start_str:
-                    continue
-                
-                # Parse as ISO datetime
-                start_dt = datetime.fromisoformat(start_str.replace('Z', '+00:00'))
-                
-                # If datetime is naive (no timezone), assume Europe/Vienna
-                if start_dt.tzinfo is None:
-                    start_local = start_dt.replace(tzinfo=ZoneInfo('Europe/Vienna'))
-                else:
-                    # Convert to Europe/Vienna timezone
-                    start_local = start_dt.astimezone(ZoneInfo('Europe/Vienna'))
-                
-                # Only include future events within the time window
-                if start_local <= now or start_local > cutoff_time:
-                    continue
-                
-                # Parse title to extract course name, room, year group, and type
-                title = event.get('title', '')
-                lecture_name, room, year_group, event_type = parse_almaty_title(title)
-                
-                lectures.append({
-                    'time': start_local.strftime('%H:%M'),
-                    'date': start_local.strftime('%Y-%m-%d'),
-                    'timestamp': start_local.isoformat(),
-                    'lecture': lecture_name,
-                    'room': room,
-                    'year_group': year_group,
-                    'type': event_type,
-                    'raw_title': title
-                })
-            except Exception as e:
-                logger.error(f"Error parsing event: {e}")
-                continue
-        
-        # Sort by timestamp and limit
-        lectures.sort(key=lambda x: x['timestamp'])
-        return lectures[:max_items]
+        # Reuse the parsed timetable while it is fresh, otherwise fetch and parse it once
+        cache_key = (tuple(cohorts_to_query), start_date)
+        if not use_cache:
+            entry = load_almaty_entry(cache_key, cohorts_to_query, start_date, end_date)
+        else:
+            entry = almaty_cache['entry']
+            if not almaty_entry_is_fresh(entry, cache_key):
+                with almaty_cache['fetch_lock']:
+                    # Another thread may have refreshed it while we waited
+                    entry = almaty_cache['entry']
+                    if not almaty_entry_is_fresh(entry, cache_key):
+                        entry = load_almaty_entry(cache_key, cohorts_to_query, start_date, end_date)
+                        if entry is not None:
+                            almaty_cache['entry'] = entry
+        if entry is None:
+            return []
+        
+        # Only include future events within the time window (starts are sorted)
+        _, _, starts, lectures = entry
+        first = bisect_right(starts, now)
+        last = bisect_right(starts, cutoff_time)
+        return lectures[first:min(last, first + max_items)]
         
     except Exception as e:
         logger.error(f"Error getting Almaty lectures: {e}")
         return []
 
 
-def parse_almaty_title(title):
+def fetch_almaty_lectures(cohorts_to_query, start_date, end_date):
     """
-    Parse Almaty timetable title to extract lecture name, room, year group, and type.
+    Fetch and parse lectures for the given cohorts from the Almaty timetable API.
     
-    Expected format examples:
-    - Regular: "Flugmechanik und Drehflügler (-114060) (IL), Arnold Uwe T.P., Standardgruppe, Online (LAV 2023)"
-    - Exam: "Prüfungstermin: B22.0587404 25S 3SSt IL Kunst- und Faserverbundwerkstoffe  bei Windbacher, -, AP149 AP149.02.212 (LAV 2023)"
+    Returns a list of (start_datetime, lecture) tuples sorted by start time,
+    or None if no cohort could be fetched.
+    """
+    # Fetch lectures for all cohorts
+    all_events = []
+    fetched_any = False
+    url = 'https://almaty.fh-joanneum.at/stundenplan/json.php'
     
-    Street codes: AP (Alte Poststraße), EA (Eggenberger Allee), ES (Eckertstraße)
+    for query_cohort in cohorts_to_query:
+        try:
+            params = {
+                'q': query_cohort,
+                'start': start_date,
+                'end': end_date
+            }
+            
+            response = http_session.get(url, params=params, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+            
+            events = orjson.loads(response.content)
+            fetched_any = True
+            if isinstance(events, list):
+                all_events.extend(events)
+        except Exception as e:
+            logger.warning(f"Error fetching lectures for cohort {query_cohort}: {e}")
+            continue
     
-    Returns: (lecture_name, room, year_group, event_type)
-    """
-    import re
+    if not fetched_any:
+        return None
     
-    # Calculate valid year groups based on current academic year
-    # Academic year runs from October 1st to September 30th
-    now = datetime.now(ZoneInfo('Europe/Vienna'))
-    current_year = now.year
-    current_month = now.month
+    # Parse events once; the request path only slices the sorted result
+    valid_years = get_valid_year_groups(get_academic_year(datetime.now(LOCAL_TZ)))
+    lectures = []
+    for event in all_events:
+        try:
+            # Parse start time (ISO format)
+            start_str = event.get('start', '')
+            if not start_str:
+                continue
+            
+            # Parse as ISO datetime
+            start_dt = datetime.fromisoformat(start_str.replace('Z', '+00:00'))
+            
+            # If datetime is naive (no timezone), assume Europe/Vienna
+            if start_dt.tzinfo is None:
+                start_local = start_dt.replace(tzinfo=LOCAL_TZ)
+            else:
+                # Convert to Europe/Vienna timezone
+                start_local = start_dt.astimezone(LOCAL_TZ)
+            
+            # Parse title to extract course name, room, year group, and type
+            title = event.get('title', '')
+            lecture_name, room, year_group, event_type = parse_almaty_title(title, valid_years)
+            
+            lectures.append((start_local, {
+                'time': start_local.strftime('%H:%M'),
+                'date': start_local.strftime('%Y-%m-%d'),
+                'timestamp': start_local.isoformat(),
+                'lecture': lecture_name,
+                'room': room,
+                'year_group': year_group,
+                'type': event_type,
+                'raw_title': title
+            }))
+        except Exception as e:
+            logger.error(f"Error parsing event: {e}")
+            continue
     
+    # Sort by start time
+    lectures.sort(key=lambda x: x[0])
+    return lectures
+
+
+def get_academic_year(now):
+    """Get the start year of the academic year (runs from October 1st to September 30th)"""
     # Determine academic year start (October = month 10)
-    if current_month >= 10:
-        academic_year = current_year
-    else:
-        academic_year = current_year - 1
+    if now.month >= 10:
+        return now.year
+    return now.year - 1
+
+
+def get_valid_year_groups(academic_year):
+    """
+    Get the year groups that are valid for an academic year.
     
-    # Valid year groups for this academic year
-    # LAV: 3rd, 2nd, 1st year (academic_year - 2, -1, 0)
-    # MAV: Master (academic_year)
-    valid_years = {
+    LAV: 3rd, 2nd, 1st year (academic_year - 2, -1, 0)
+    MAV: Master (academic_year)
+    """
+    return frozenset({
         f'LAV{str(academic_year - 2)[-2:]}',
         f'LAV{str(academic_year - 1)[-2:]}',
         f'LAV{str(academic_year)[-2:]}',
         f'MAV{str(academic_year)[-2:]}'
-    }
+    })
+
+
+def parse_almaty_title(title, valid_years=None):
+    """
+    Parse Almaty timetable title to extract lecture name, room, year group, and type.
+    
+    Expected format examples:
+    - Regular: "Flugmechanik und Drehflügler (-114060) (IL), Arnold Uwe T.P., Standardgruppe, Online (LAV 2023)"
+    - Exam: "Prüfungstermin: B22.0587404 25S 3SSt IL Kunst- und Faserverbundwerkstoffe  bei Windbacher, -, AP149 AP149.02.212 (LAV 2023)"
+    
+    Street codes: AP (Alte Poststraße), EA (Eggenberger Allee), ES (Eckertstraße)
+    
+    valid_years can be passed in (see get_valid_year_groups) when parsing many titles,
+    otherwise it is derived from the current date.
+    
+    Returns: (lecture_name, room, year_group, event_type)
+    """
+    if valid_years is None:
+        valid_years = get_valid_year_groups(get_academic_year(datetime.now(LOCAL_TZ)))
     
     # Extract year group from end (e.g., "LAV 2023" or "MAV 2025")
     year_match = re.search(r'\(([A-Z]+)\s*(\d{4})\)\s*$', title)
@@ -862,13 +1178,19 @@ def parse_almaty_title(title):
     return course_name, room, event_type
 
 
-def save_flight_routes_cache(cache):
-    """Save flight routes cache to file"""
-    try:
-        with open(FLIGHT_ROUTES_CACHE_FILE, 'w') as f:
-            json.dump(cache, f, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving flight routes cache: {e}")
+# How long a route that neither OpenSky nor AirLabs knew is trusted before retrying
+ROUTE_NOT_FOUND_TTL = 3 * 24 * 3600  # 3 days
+
+# Everything that isn't a letter (matches what str.isalpha rejects)
+NON_ALPHA_RE = re.compile(r'[\W\d_]+')
+
+
+def get_route_age_seconds(route):
+    """Seconds since a cached route was last updated, or None if unknown"""
+    last_seen_ts = route.get('last_seen_ts')
+    if last_seen_ts is None:
+        return None
+    return time.time() - last_seen_ts
 
 
 def get_route_from_cache(callsign, cache, cache_days=7):
@@ -880,60 +1202,49 @@ def get_route_from_cache(callsign, cache, cache_days=7):
     if callsign in cache:
         route = cache[callsign]
         # Check if cache is still valid
-        if 'last_seen' in route:
-            try:
-                last_seen = datetime.fromisoformat(route['last_seen'])
-                age_days = (datetime.now() - last_seen).days
-                if age_days < cache_days:
-                    return route.get('from', ''), route.get('to', ''), True
-                else:
-                    return route.get('from', ''), route.get('to', ''), False  # Expired
-            except:
-                pass
+        age = get_route_age_seconds(route)
+        if age is not None and age >= cache_days * 86400:
+            return route.get('from', ''), route.get('to', ''), False  # Expired
         return route.get('from', ''), route.get('to', ''), True
     
     # Try without flight number (e.g., "UAL123" -> "UAL")
-    airline_code = ''.join(filter(str.isalpha, callsign[:3]))
+    # Airline-level entries are used regardless of age
+    airline_code = NON_ALPHA_RE.sub('', callsign[:3])
     if airline_code and airline_code in cache:
         route = cache[airline_code]
-        if 'last_seen' in route:
-            try:
-                last_seen = datetime.fromisoformat(route['last_seen'])
-                age_days = (datetime.now() - last_seen).days
-                if age_days < cache_days:
-                    return route.get('from', ''), route.get('to', ''), True
-            except:
-                pass
         return route.get('from', ''), route.get('to', ''), True
     
     return '', '', False
 
 
 def update_route_cache(callsign, from_airport, to_airport, cache, not_found=False, tried_airlabs=False):
-    """Update the route cache with new information"""
+    """Update the in-memory route cache (persist with save_flight_routes_cache)"""
     if not callsign:
         return
     
-    cache[callsign] = {
+    route = {
         'from': from_airport or '',
         'to': to_airport or '',
         'last_seen': datetime.now().isoformat(),
+        'last_seen_ts': time.time(),  # Epoch copy of last_seen for cheap age checks
         'not_found': not_found,  # Mark if route lookup failed (404)
         'tried_airlabs': tried_airlabs  # Track if we tried AirLabs API
     }
-    save_flight_routes_cache(cache)
+    # The cache dict is shared between requests; don't resize it while a save iterates it
+    with flight_routes_lock:
+        cache[callsign] = route
 
 
 # OAuth2 token cache
+# expires_at is on the time.monotonic() clock so wall-clock steps (NTP) can't expire it early
 _opensky_token_cache = {'token': None, 'expires_at': 0}
 
 def get_opensky_token(client_id, client_secret):
     """Get OAuth2 access token for OpenSky API (cached for 30 minutes)"""
-    global _opensky_token_cache
-    
     # Check if cached token is still valid
-    if _opensky_token_cache['token'] and time.time() < _opensky_token_cache['expires_at']:
-        return _opensky_token_cache['token']
+    token = _opensky_token_cache['token']
+    if token and time.monotonic() < _opensky_token_cache['expires_at']:
+        return token
     
     try:
         token_url = "https://auth.opensky-network.org/auth/realms/opensky-network/protocol/openid-connect/token"
@@ -943,15 +1254,15 @@ def get_opensky_token(client_id, client_secret):
             'client_secret': client_secret
         }
         
-        response = requests.post(token_url, data=data, timeout=10)
+        response = http_session.post(token_url, data=data, timeout=HTTP_TIMEOUT)
         if response.status_code == 200:
-            token_data = response.json()
+            token_data = orjson.loads(response.content)
             token = token_data.get('access_token')
             expires_in = token_data.get('expires_in', 1800)  # Default 30 minutes
             
             # Cache token (refresh 1 minute before expiry)
             _opensky_token_cache['token'] = token
-            _opensky_token_cache['expires_at'] = time.time() + expires_in - 60
+            _opensky_token_cache['expires_at'] = time.monotonic() + expires_in - 60
             
             logger.info("OpenSky: OAuth2 token obtained successfully")
             return token
@@ -989,10 +1300,10 @@ def fetch_route_from_opensky(icao24, config):
             if token:
                 headers['Authorization'] = f'Bearer {token}'
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
         
         if response.status_code == 200:
-            flights = response.json()
+            flights = orjson.loads(response.content)
             if flights and len(flights) > 0:
                 # Get the most recent flight
                 latest_flight = flights[-1]
@@ -1003,17 +1314,17 @@ def fetch_route_from_opensky(icao24, config):
                     logger.info(f"OpenSky: Found route for {icao24}: {departure} → {arrival}")
                     return departure, arrival
             else:
-                logger.debug(f"OpenSky: No flights found for {icao24} in database")
+                logger.debug("OpenSky: No flights found for %s in database", icao24)
         elif response.status_code == 401:
             logger.warning("OpenSky API: Authentication failed. Check credentials.")
         elif response.status_code == 404:
-            logger.debug(f"OpenSky: No data found for {icao24} (404)")
+            logger.debug("OpenSky: No data found for %s (404)", icao24)
         elif response.status_code == 429:
             logger.warning("OpenSky API: Rate limit exceeded. Using cache only.")
         elif response.status_code == 400:
             # Log the actual error message from OpenSky
             try:
-                error_data = response.json()
+                error_data = orjson.loads(response.content)
                 logger.warning(f"OpenSky API 400 error for {icao24}: {error_data}")
             except:
                 logger.warning(f"OpenSky API 400 error for {icao24}: {response.text}")
@@ -1065,18 +1376,18 @@ def fetch_route_from_airlabs(flight_number, config):
         logger.info(f"AirLabs: Querying route for {iata_flight}")
         
         # AirLabs routes endpoint
-        url = f"https://airlabs.co/api/v9/routes"
+        url = "https://airlabs.co/api/v9/routes"
         params = {
             'api_key': api_key,
             'flight_iata': iata_flight  # Try IATA format
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_session.get(url, params=params, timeout=HTTP_TIMEOUT)
         
         logger.info(f"AirLabs: API response status {response.status_code}")
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data.get('response') and len(data['response']) > 0:
                 route = data['response'][0]
                 departure = route.get('dep_iata', '')
@@ -1108,6 +1419,13 @@ def index():
     return render_template('display.html')
 
 
+@app.route('/api/health')
+def health_check():
+    """Health check endpoint (polled by install/debug scripts and monitoring)"""
+    timestamp = datetime.now().isoformat().encode('ascii')
+    return app.response_class(HEALTH_RESPONSE_PREFIX + timestamp + b'"}', mimetype='application/json')
+
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Admin login page"""
@@ -1175,6 +1493,7 @@ def change_password():
 
 
 @app.route('/api/dashboard/config', methods=['GET'])
+@conditional_response
 def get_dashboard_config():
     """Get dashboard configuration"""
     config = load_dashboard_config()
@@ -1197,8 +1516,9 @@ def update_dashboard_config():
 
 
 @app.route('/api/dashboard/weather')
+@conditional_response
 def get_weather():
-    """Get weather data from OpenWeatherMap"""
+    """Get weather data from OpenWeatherMap (cached to coalesce dashboard polling)"""
     try:
         config = load_dashboard_config()
         api_key = config.get('weather', {}).get('api_key', '')
@@ -1220,50 +1540,91 @@ def get_weather():
         lat = config.get('location', {}).get('lat', 50.0)
         lon = config.get('location', {}).get('lon', 8.0)
         
-        # Try One Call API 3.0 first (newer)
-        url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&appid={api_key}&units=metric&exclude=minutely,hourly,daily,alerts"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            current = data.get('current', {})
-            weather = {
-                'temp': current.get('temp', 0),
-                'description': current.get('weather', [{}])[0].get('description', 'N/A').capitalize(),
-                'wind': round(current.get('wind_speed', 0) * 3.6, 1),  # Convert m/s to km/h
-                'humidity': current.get('humidity', 0),
-                'pressure': current.get('pressure', 1013),
-                'visibility': round(current.get('visibility', 10000) / 1000, 1),  # Convert m to km
-                'icon': current.get('weather', [{}])[0].get('icon', '01d')
-            }
-            return jsonify({'success': True, 'weather': weather})
-        elif response.status_code == 401:
-            # If One Call API fails, try the free Current Weather API
-            logger.info("One Call API 3.0 failed, trying Current Weather Data API")
-            url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                weather = {
-                    'temp': data['main']['temp'],
-                    'description': data['weather'][0]['description'].capitalize(),
-                    'wind': round(data['wind']['speed'] * 3.6, 1),  # Convert m/s to km/h
-                    'humidity': data['main']['humidity'],
-                    'pressure': data['main']['pressure'],
-                    'visibility': round(data.get('visibility', 10000) / 1000, 1),  # Convert m to km
-                    'icon': data['weather'][0]['icon']
-                }
-                return jsonify({'success': True, 'weather': weather})
-        
-        return jsonify({'success': False, 'message': 'Weather API error'}), 500
+        # Check cache first (only valid for the same location and API key)
+        cache_key = (lat, lon, api_key)
+        entry = weather_cache['entry']
+        if entry is not None and entry[0] == cache_key:
+            cache_age = time.time() - entry[1]
+            if cache_age < weather_cache['max_stale']:
+                if cache_age >= weather_cache['ttl']:
+                    # Serve the stale value now and refresh it off the request path
+                    refresh_cache_in_background(weather_cache, lambda: update_weather_cache(cache_key))
+                logger.debug("Returning cached weather data (age: %.1fs)", cache_age)
+                return jsonify({'success': True, 'weather': entry[2]})
+        
+        with weather_cache['fetch_lock']:
+            # Concurrent polls wait here and reuse whatever the first one fetched
+            entry = weather_cache['entry']
+            if entry is not None and entry[0] == cache_key and time.time() - entry[1] < weather_cache['ttl']:
+                return jsonify({'success': True, 'weather': entry[2]})
+            weather = update_weather_cache(cache_key)
+        if weather is None:
+            return jsonify({'success': False, 'message': 'Weather API error'}), 500
+        
+        return jsonify({'success': True, 'weather': weather})
             
     except Exception as e:
         logger.error(f"Error fetching weather: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+def update_weather_cache(cache_key):
+    """Fetch weather for a (lat, lon, api_key) cache key and store it in the cache"""
+    current_time = time.time()
+    lat, lon, api_key = cache_key
+    weather = fetch_weather(lat, lon, api_key)
+    if weather is not None:
+        weather_cache['entry'] = (cache_key, current_time, weather)
+    return weather
+
+
+def fetch_weather(lat, lon, api_key):
+    """Fetch current weather from OpenWeatherMap, returns None on API error"""
+    # Try One Call API 3.0 first (newer)
+    response = http_session.get(
+        OWM_ONECALL_URL,
+        params={'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric', 'exclude': OWM_ONECALL_EXCLUDE},
+        timeout=HTTP_TIMEOUT_SHORT
+    )
+    
+    if response.status_code == 200:
+        data = orjson.loads(response.content)
+        current = data.get('current', {})
+        return {
+            'temp': current.get('temp', 0),
+            'description': current.get('weather', [{}])[0].get('description', 'N/A').capitalize(),
+            'wind': round(current.get('wind_speed', 0) * 3.6, 1),  # Convert m/s to km/h
+            'humidity': current.get('humidity', 0),
+            'pressure': current.get('pressure', 1013),
+            'visibility': round(current.get('visibility', 10000) / 1000, 1),  # Convert m to km
+            'icon': current.get('weather', [{}])[0].get('icon', '01d')
+        }
+    elif response.status_code == 401:
+        # If One Call API fails, try the free Current Weather API
+        logger.info("One Call API 3.0 failed, trying Current Weather Data API")
+        response = http_session.get(
+            OWM_CURRENT_URL,
+            params={'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric'},
+            timeout=HTTP_TIMEOUT_SHORT
+        )
+        
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            return {
+                'temp': data['main']['temp'],
+                'description': data['weather'][0]['description'].capitalize(),
+                'wind': round(data['wind']['speed'] * 3.6, 1),  # Convert m/s to km/h
+                'humidity': data['main']['humidity'],
+                'pressure': data['main']['pressure'],
+                'visibility': round(data.get('visibility', 10000) / 1000, 1),  # Convert m to km
+                'icon': data['weather'][0]['icon']
+            }
+    
+    return None
+
+
 @app.route('/api/dashboard/transport')
+@conditional_response
 def get_transport():
     """Get public transport departures"""
     try:
@@ -1293,6 +1654,7 @@ def get_transport():
 
 
 @app.route('/api/dashboard/timetable')
+@conditional_response
 def get_timetable():
     """Get upcoming lectures from FH JOANNEUM Almaty timetable API"""
     try:
@@ -1322,24 +1684,57 @@ def get_timetable():
 
 
 @app.route('/api/dashboard/nearest-flights')
+@conditional_response
 def get_nearest_flights():
     """Get nearest flights from selected API provider with caching"""
     try:
-        # Check cache first
-        current_time = time.time()
-        if flights_cache['data'] is not None and (current_time - flights_cache['timestamp']) < flights_cache['ttl']:
-            logger.debug(f"Returning cached flights data (age: {current_time - flights_cache['timestamp']:.1f}s)")
-            return flights_cache['data']
-        
-        config = load_dashboard_config()
-        airlabs_config = config.get('airlabs', {})
-        
-        if not airlabs_config.get('enabled', True):
-            result = jsonify({'success': True, 'flights': []})
-            flights_cache['data'] = result
-            flights_cache['timestamp'] = current_time
-            return result
-        
+        # Check cache first (only valid for the same provider, location and radius)
+        cache_key = get_flights_cache_key(load_dashboard_config())
+        entry = flights_cache['entry']
+        if entry is not None and entry[0] == cache_key:
+            cache_age = time.time() - entry[1]
+            if cache_age < flights_cache['max_stale']:
+                if cache_age >= flights_cache['ttl']:
+                    # Serve the stale list now and refresh it off the request path
+                    refresh_cache_in_background(flights_cache, update_flights_cache)
+                logger.debug("Returning cached flights data (age: %.1fs)", cache_age)
+                return app.response_class(entry[2], mimetype='application/json')
+        
+        with flights_cache['fetch_lock']:
+            # Concurrent polls wait here and reuse whatever the first one fetched
+            entry = flights_cache['entry']
+            if entry is not None and entry[0] == cache_key and time.time() - entry[1] < flights_cache['ttl']:
+                return app.response_class(entry[2], mimetype='application/json')
+            return update_flights_cache()
+            
+    except Exception as e:
+        logger.error(f"Error fetching nearest flights: {e}")
+        return jsonify({'success': False, 'flights': [], 'message': str(e)})
+
+
+def get_flights_cache_key(config):
+    """Settings that determine the nearest-flights result, used to key flights_cache"""
+    airlabs_config = config.get('airlabs', {})
+    location = config.get('location', {})
+    return (
+        airlabs_config.get('enabled', True),
+        airlabs_config.get('api_provider', 'airplaneslive'),
+        location.get('lat', 50.0),
+        location.get('lon', 8.0),
+        airlabs_config.get('radius_km', 75),
+        airlabs_config.get('api_key', '').strip()  # A newly saved AirLabs key must not hit the "not configured" result
+    )
+
+
+def update_flights_cache():
+    """Fetch nearest flights from the configured provider and store the result in the cache"""
+    current_time = time.time()
+    config = load_dashboard_config()
+    airlabs_config = config.get('airlabs', {})
+    
+    if not airlabs_config.get('enabled', True):
+        result = jsonify({'success': True, 'flights': []})
+    else:
         api_provider = airlabs_config.get('api_provider', 'airplaneslive')
         
         if api_provider == 'airlabs':
@@ -1350,17 +1745,84 @@ def get_nearest_flights():
             result = get_flights_opensky(config, airlabs_config)
         else:
             return jsonify({'success': False, 'message': 'Unknown API provider'}), 400
-        
-        # Cache the result
-        flights_cache['data'] = result
-        flights_cache['timestamp'] = current_time
-        logger.debug(f"Cached new flights data at {current_time}")
-        
+    
+    # Providers report upstream failures as success: False; keep the previous
+    # (possibly stale) flights instead of caching the error
+    if not result.get_json().get('success'):
         return result
-            
-    except Exception as e:
-        logger.error(f"Error fetching nearest flights: {e}")
-        return jsonify({'success': False, 'flights': [], 'message': str(e)})
+    
+    # Cache the serialized body; each request gets its own Response object
+    flights_cache['entry'] = (get_flights_cache_key(config), current_time, result.get_data())
+    logger.debug("Cached new flights data at %s", current_time)
+    
+    return result
+
+
+# Airline names by 3-letter ICAO code (callsign prefix)
+AIRLINE_NAMES_ICAO = {
+    'AAL': 'American', 'DAL': 'Delta', 'UAL': 'United', 'SWA': 'Southwest',
+    'BAW': 'British Airways', 'DLH': 'Lufthansa', 'AFR': 'Air France', 'KLM': 'KLM',
+    'UAE': 'Emirates', 'QTR': 'Qatar', 'SIA': 'Singapore',
+    'SWR': 'Swiss', 'AUA': 'Austrian', 'BEL': 'Brussels', 'TAP': 'TAP',
+    'IBE': 'Iberia', 'AZA': 'ITA', 'SAS': 'SAS', 'FIN': 'Finnair',
+    'RYR': 'Ryanair', 'EZY': 'easyJet', 'WZZ': 'Wizz Air', 'VLG': 'Vueling',
+    'IGO': 'IndiGo', 'QFA': 'Qantas', 'ANZ': 'Air NZ', 'ACA': 'Air Canada',
+    'ANA': 'ANA', 'JAL': 'JAL', 'CPA': 'Cathay', 'THY': 'Turkish',
+    'ETH': 'Ethiopian', 'SAA': 'South African', 'ETD': 'Etihad', 'SVA': 'Saudia'
+}
+
+# Airline names by 2-letter IATA code (as reported by AirLabs)
+AIRLINE_NAMES_IATA = {
+    'AA': 'American Airlines', 'DL': 'Delta', 'UA': 'United', 'WN': 'Southwest',
+    'BA': 'British Airways', 'LH': 'Lufthansa', 'AF': 'Air France', 'KL': 'KLM',
+    'EK': 'Emirates', 'QR': 'Qatar Airways', 'SQ': 'Singapore Airlines',
+    'LX': 'Swiss', 'OS': 'Austrian', 'SN': 'Brussels Airlines', 'TP': 'TAP Portugal',
+    'IB': 'Iberia', 'AZ': 'ITA Airways', 'SK': 'SAS', 'AY': 'Finnair',
+    'FR': 'Ryanair', 'U2': 'easyJet', 'W6': 'Wizz Air', 'VY': 'Vueling',
+    '6E': 'IndiGo', 'QF': 'Qantas', 'NZ': 'Air New Zealand', 'AC': 'Air Canada',
+    'NH': 'ANA', 'JL': 'JAL', 'CX': 'Cathay Pacific', 'TK': 'Turkish Airlines',
+    'ET': 'Ethiopian', 'SA': 'South African', 'EY': 'Etihad', 'SV': 'Saudia',
+    'AI': 'Air India', 'TG': 'Thai Airways', 'MH': 'Malaysia Airlines',
+    'GA': 'Garuda', 'PR': 'Philippine Airlines', 'VN': 'Vietnam Airlines',
+    'CA': 'Air China', 'MU': 'China Eastern', 'CZ': 'China Southern',
+    'AM': 'Aeromexico', 'CM': 'Copa Airlines', 'LA': 'LATAM', 'AR': 'Aerolineas',
+    'AV': 'Avianca', 'G3': 'Gol', 'JJ': 'LATAM Brasil'
+}
+
+
+# Leading 2-3 letters of a callsign (greedy, so a 3-letter code wins over 2)
+AIRLINE_PREFIX_RE = re.compile(r'[^\W\d_]{2,3}')
+
+
+@lru_cache(maxsize=2048)
+def extract_airline(callsign):
+    """Return (airline_code, airline_name) from a callsign's 2-3 letter prefix (memoized)"""
+    match = AIRLINE_PREFIX_RE.match(callsign) if callsign else None
+    airline_code = match.group() if match else ''
+    return airline_code, AIRLINE_NAMES_ICAO.get(airline_code, '')
+
+
+def lookup_route(callsign, icao24, config, use_opensky):
+    """Look up a route via OpenSky (if usable) with AirLabs as fallback.
+    
+    Returns (from_airport, to_airport, tried_airlabs); both airports are empty if nothing was found.
+    """
+    if use_opensky:
+        logger.info(f"Fetching route for {callsign} (ICAO24: {icao24}) from OpenSky...")
+        from_airport, to_airport = fetch_route_from_opensky(icao24, config)
+        if from_airport or to_airport:
+            logger.info(f"Found route for {callsign}: {from_airport} → {to_airport}")
+            return from_airport, to_airport, False
+        logger.info(f"No route found in OpenSky for {callsign}, trying AirLabs...")
+    else:
+        logger.info(f"Trying AirLabs directly for {callsign}...")
+    
+    from_airport, to_airport = fetch_route_from_airlabs(callsign, config)
+    if from_airport or to_airport:
+        logger.info(f"AirLabs found route for {callsign}: {from_airport} → {to_airport}")
+    else:
+        logger.info(f"No route found for {callsign} in OpenSky or AirLabs")
+    return from_airport or '', to_airport or '', True
 
 
 def get_flights_airplaneslive(config, flight_config):
@@ -1380,14 +1842,15 @@ def get_flights_airplaneslive(config, flight_config):
         # Call airplanes.live API
         url = f"http://api.airplanes.live/v2/point/{lat}/{lon}/{radius_nm}"
         
-        response = requests.get(url, timeout=10)
+        response = http_session.get(url, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         aircraft_list = data.get('ac', [])
         
         # Format flights
         nearby_flights = []
+        pending_lookups = {}  # callsign -> (icao24, use_opensky, [flights])
         for aircraft in aircraft_list:
             if not aircraft.get('lat') or not aircraft.get('lon'):
                 continue
@@ -1398,28 +1861,7 @@ def get_flights_airplaneslive(config, flight_config):
                 callsign = aircraft.get('r', 'Unknown')
             
             # Try to extract airline from callsign (first 2-3 letters)
-            airline_code = ''
-            airline_name = ''
-            if len(callsign) >= 2:
-                # Try 3-letter code first
-                if len(callsign) >= 3 and callsign[:3].isalpha():
-                    airline_code = callsign[:3]
-                elif callsign[:2].isalpha():
-                    airline_code = callsign[:2]
-                
-                # Map common airline codes
-                airline_names = {
-                    'AAL': 'American', 'DAL': 'Delta', 'UAL': 'United', 'SWA': 'Southwest',
-                    'BAW': 'British Airways', 'DLH': 'Lufthansa', 'AFR': 'Air France', 'KLM': 'KLM',
-                    'UAE': 'Emirates', 'QTR': 'Qatar', 'SIA': 'Singapore',
-                    'SWR': 'Swiss', 'AUA': 'Austrian', 'BEL': 'Brussels', 'TAP': 'TAP',
-                    'IBE': 'Iberia', 'AZA': 'ITA', 'SAS': 'SAS', 'FIN': 'Finnair',
-                    'RYR': 'Ryanair', 'EZY': 'easyJet', 'WZZ': 'Wizz Air', 'VLG': 'Vueling',
-                    'IGO': 'IndiGo', 'QFA': 'Qantas', 'ANZ': 'Air NZ', 'ACA': 'Air Canada',
-                    'ANA': 'ANA', 'JAL': 'JAL', 'CPA': 'Cathay', 'THY': 'Turkish',
-                    'ETH': 'Ethiopian', 'SAA': 'South African', 'ETD': 'Etihad', 'SVA': 'Saudia'
-                }
-                airline_name = airline_names.get(airline_code, '')
+            airline_code, airline_name = extract_airline(callsign)
             
             # Try to get route from cache
             opensky_config = config.get('opensky', {})
@@ -1429,66 +1871,25 @@ def get_flights_airplaneslive(config, flight_config):
             # Check if this aircraft was previously marked as not found
             skip_lookup = False
             tried_airlabs = False
-            if callsign in route_cache:
-                cached = route_cache[callsign]
-                tried_airlabs = cached.get('tried_airlabs', False)
+            cached = route_cache.get(callsign)
+            if cached:
                 if cached.get('not_found', False):
-                    # Skip lookup if not_found was set within last 24 hours AND we already tried AirLabs
-                    try:
-                        last_seen = datetime.fromisoformat(cached['last_seen'])
-                        hours_since = (datetime.now() - last_seen).total_seconds() / 3600
-                        if hours_since < 24 and tried_airlabs:
-                            skip_lookup = True
-                            logger.debug(f"Skipping lookup for {callsign} (not found {hours_since:.1f}h ago, tried all sources)")
-                        elif hours_since < 24 and not tried_airlabs:
-                            # OpenSky failed but we haven't tried AirLabs yet
-                            logger.debug(f"Will retry {callsign} with AirLabs (OpenSky failed {hours_since:.1f}h ago)")
-                    except:
-                        pass
+                    # Trust the negative result for ROUTE_NOT_FOUND_TTL, then retry all sources
+                    age = get_route_age_seconds(cached)
+                    if age is not None and age < ROUTE_NOT_FOUND_TTL:
+                        skip_lookup = True
+                        logger.debug("Skipping lookup for %s (not found %.1fh ago, tried all sources)", callsign, age / 3600)
+                else:
+                    tried_airlabs = cached.get('tried_airlabs', False)
             
-            # If not in cache or expired, try to fetch from OpenSky
+            # If not in cache or expired, queue a lookup (OpenSky first, AirLabs as fallback)
             icao24 = aircraft.get('hex', '').lower()
+            needs_lookup = False
             if not skip_lookup and ((not from_airport and not to_airport) or not is_valid):
-                if icao24 and opensky_config.get('enabled', True) and not tried_airlabs:
-                    logger.info(f"Fetching route for {callsign} (ICAO24: {icao24}) from OpenSky...")
-                    # Fetch from OpenSky in background (don't block)
-                    opensky_from, opensky_to = fetch_route_from_opensky(icao24, config)
-                    if opensky_from or opensky_to:
-                        from_airport = opensky_from or from_airport
-                        to_airport = opensky_to or to_airport
-                        logger.info(f"Found route for {callsign}: {from_airport} → {to_airport}")
-                        # Update cache with successful result
-                        update_route_cache(callsign, from_airport, to_airport, route_cache, not_found=False)
-                    else:
-                        # If OpenSky didn't find anything, try AirLabs as fallback
-                        logger.info(f"No route found in OpenSky for {callsign}, trying AirLabs...")
-                        airlabs_from, airlabs_to = fetch_route_from_airlabs(callsign, config)
-                        if airlabs_from or airlabs_to:
-                            from_airport = airlabs_from or from_airport
-                            to_airport = airlabs_to or to_airport
-                            logger.info(f"AirLabs found route for {callsign}: {from_airport} → {to_airport}")
-                            # Update cache with AirLabs result
-                            update_route_cache(callsign, from_airport, to_airport, route_cache, not_found=False, tried_airlabs=True)
-                        else:
-                            logger.info(f"No route found for {callsign} in OpenSky or AirLabs")
-                            # Cache the negative result to avoid retrying
-                            update_route_cache(callsign, '', '', route_cache, not_found=True, tried_airlabs=True)
-                elif not tried_airlabs:
-                    # Only try AirLabs if we haven't tried it before
-                    logger.info(f"Trying AirLabs directly for {callsign}...")
-                    airlabs_from, airlabs_to = fetch_route_from_airlabs(callsign, config)
-                    if airlabs_from or airlabs_to:
-                        from_airport = airlabs_from or from_airport
-                        to_airport = airlabs_to or to_airport
-                        logger.info(f"AirLabs found route for {callsign}: {from_airport} → {to_airport}")
-                        # Update cache with AirLabs result
-                        update_route_cache(callsign, from_airport, to_airport, route_cache, not_found=False, tried_airlabs=True)
-                    else:
-                        logger.debug(f"AirLabs: No route for {callsign}")
-                        # Cache negative result
-                        update_route_cache(callsign, '', '', route_cache, not_found=True, tried_airlabs=True)
+                if not tried_airlabs:
+                    needs_lookup = True
                 else:
-                    logger.debug(f"OpenSky lookup disabled or no ICAO24 for {callsign}")
+                    logger.debug("OpenSky lookup disabled or no ICAO24 for %s", callsign)
             
             aircraft_type_code = aircraft.get('t', '')
             
@@ -1497,9 +1898,9 @@ def get_flights_airplaneslive(config, flight_config):
             if not aircraft_type_code and callsign and len(callsign) > 1:
                 if callsign[0].upper() == 'C' and callsign[1:].isdigit():
                     aircraft_type_code = 'H145'  # Common type for Christophorus fleet
-                    logger.debug(f"Detected Christophorus helicopter: {callsign} -> H145")
+                    logger.debug("Detected Christophorus helicopter: %s -> H145", callsign)
             
-            nearby_flights.append({
+            flight = {
                 'callsign': callsign,
                 'flight_number': callsign,
                 'airline': airline_code,
@@ -1512,13 +1913,41 @@ def get_flights_airplaneslive(config, flight_config):
                 'distance': round(aircraft.get('dst', 0), 1),  # Already in km
                 'from': from_airport,  # From cache if available
                 'to': to_airport  # From cache if available
-            })
-        
-        # Sort by distance and get nearest 4
-        nearby_flights.sort(key=lambda x: x['distance'])
-        nearest = nearby_flights[:4]
+            }
+            nearby_flights.append(flight)
+            
+            if needs_lookup:
+                if callsign not in pending_lookups:
+                    use_opensky = bool(icao24) and opensky_config.get('enabled', True)
+                    pending_lookups[callsign] = (icao24, use_opensky, [])
+                pending_lookups[callsign][2].append(flight)
+        
+        # Run the route lookups concurrently; each one is a blocking HTTPS round-trip
+        if pending_lookups:
+            futures = {
+                callsign: io_executor.submit(lookup_route, callsign, icao24, config, use_opensky)
+                for callsign, (icao24, use_opensky, _) in pending_lookups.items()
+            }
+            
+            for callsign, future in futures.items():
+                found_from, found_to, tried_airlabs = future.result()
+                flights = pending_lookups[callsign][2]
+                if found_from or found_to:
+                    from_airport = found_from or flights[0]['from']
+                    to_airport = found_to or flights[0]['to']
+                    for flight in flights:
+                        flight['from'] = from_airport
+                        flight['to'] = to_airport
+                    update_route_cache(callsign, from_airport, to_airport, route_cache, not_found=False, tried_airlabs=tried_airlabs)
+                else:
+                    # Cache the negative result to avoid retrying
+                    update_route_cache(callsign, '', '', route_cache, not_found=True, tried_airlabs=True)
+            
+            # Write the route cache once per poll instead of once per looked-up callsign
+            save_flight_routes_cache(route_cache)
         
-        return jsonify({'success': True, 'flights': nearest})
+        # Get nearest 4 by distance
+        return nearest_flights_response(nearby_flights, 4)
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching flights from airplanes.live: {e}")
@@ -1528,6 +1957,13 @@ def get_flights_airplaneslive(config, flight_config):
         return jsonify({'success': False, 'flights': [], 'message': str(e)})
 
 
+# OpenSky state vector aircraft category (index 17) to display label
+OPENSKY_CATEGORIES = {
+    2: 'Light', 3: 'Small', 4: 'Large', 5: 'Heavy', 6: 'Super Heavy',
+    7: 'High Perf', 8: 'Helicopter', 9: 'Glider', 14: 'UAV'
+}
+
+
 def get_flights_opensky(config, flight_config):
     """Get flights from OpenSky Network API (free, no authentication)"""
     try:
@@ -1537,94 +1973,48 @@ def get_flights_opensky(config, flight_config):
         radius_km = flight_config.get('radius_km', 75)
         
         # Calculate bounding box (approximately)
-        # 1 degree latitude ≈ 111 km
-        lat_offset = radius_km / 111.0
-        # 1 degree longitude varies by latitude
-        lon_offset = radius_km / (111.0 * math.cos(math.radians(lat)))
-        
-        lamin = lat - lat_offset
-        lamax = lat + lat_offset
-        lomin = lon - lon_offset
-        lomax = lon + lon_offset
+        lamin, lamax, lomin, lomax = bbox_from_radius(lat, lon, radius_km)
         
         # Call OpenSky API
-        url = f"https://opensky-network.org/api/states/all?lamin={lamin}&lomin={lomin}&lamax={lamax}&lomax={lomax}"
+        url = "https://opensky-network.org/api/states/all"
+        params = {'lamin': lamin, 'lomin': lomin, 'lamax': lamax, 'lomax': lomax}
         
-        response = requests.get(url, timeout=10)
+        response = http_session.get(url, params=params, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         states = data.get('states', [])
         
         if not states:
             return jsonify({'success': True, 'flights': []})
         
         # Format flights
+        distance_km_from_home = make_distance_km(lat, lon)
         nearby_flights = []
         for state in states:
             # State vector format: [icao24, callsign, origin_country, time_position, last_contact,
             #                       longitude, latitude, baro_altitude, on_ground, velocity,
             #                       true_track, vertical_rate, sensors, geo_altitude, squawk, spi, position_source, category]
             
-            if len(state) < 8 or not state[5] or not state[6]:  # Need lon/lat
+            # Need lon/lat; skip if on ground
+            if len(state) < 10 or not state[5] or not state[6] or state[8]:
                 continue
             
-            if state[8]:  # Skip if on ground
-                continue
-            
-            icao24 = state[0] or ''
-            callsign = (state[1] or '').strip()
-            origin_country = state[2] or ''
-            lon_aircraft = state[5]
-            lat_aircraft = state[6]
-            altitude_m = state[7]  # meters
+            icao24, callsign, origin_country = state[0] or '', (state[1] or '').strip(), state[2] or ''
+            lon_aircraft, lat_aircraft, altitude_m = state[5], state[6], state[7]  # altitude in meters
             velocity_ms = state[9]  # m/s
             
-            # Calculate distance using Haversine formula
-            lat1, lon1 = math.radians(lat), math.radians(lon)
-            lat2, lon2 = math.radians(lat_aircraft), math.radians(lon_aircraft)
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-            c = 2 * math.asin(math.sqrt(a))
-            distance_km = 6371 * c
+            distance_km = distance_km_from_home(lat_aircraft, lon_aircraft)
             
             # Convert units
             altitude_ft = int(altitude_m * 3.28084) if altitude_m else 0  # meters to feet
             speed_kts = int(velocity_ms * 1.94384) if velocity_ms else 0  # m/s to knots
             
             # Extract airline from callsign
-            airline_code = ''
-            airline_name = ''
-            if callsign and len(callsign) >= 2:
-                if len(callsign) >= 3 and callsign[:3].isalpha():
-                    airline_code = callsign[:3]
-                elif callsign[:2].isalpha():
-                    airline_code = callsign[:2]
-                
-                # Map common airline codes (3-letter ICAO)
-                airline_names = {
-                    'AAL': 'American', 'DAL': 'Delta', 'UAL': 'United', 'SWA': 'Southwest',
-                    'BAW': 'British Airways', 'DLH': 'Lufthansa', 'AFR': 'Air France', 'KLM': 'KLM',
-                    'UAE': 'Emirates', 'QTR': 'Qatar', 'SIA': 'Singapore',
-                    'SWR': 'Swiss', 'AUA': 'Austrian', 'BEL': 'Brussels', 'TAP': 'TAP',
-                    'IBE': 'Iberia', 'AZA': 'ITA', 'SAS': 'SAS', 'FIN': 'Finnair',
-                    'RYR': 'Ryanair', 'EZY': 'easyJet', 'WZZ': 'Wizz Air', 'VLG': 'Vueling',
-                    'IGO': 'IndiGo', 'QFA': 'Qantas', 'ANZ': 'Air NZ', 'ACA': 'Air Canada',
-                    'ANA': 'ANA', 'JAL': 'JAL', 'CPA': 'Cathay', 'THY': 'Turkish',
-                    'ETH': 'Ethiopian', 'SAA': 'South African', 'ETD': 'Etihad', 'SVA': 'Saudia'
-                }
-                airline_name = airline_names.get(airline_code, '')
+            airline_code, airline_name = extract_airline(callsign)
             
             # Get aircraft category
-            category = ''
-            if len(state) > 17 and state[17]:
-                cat_num = state[17]
-                categories = {
-                    2: 'Light', 3: 'Small', 4: 'Large', 5: 'Heavy', 6: 'Super Heavy',
-                    7: 'High Perf', 8: 'Helicopter', 9: 'Glider', 14: 'UAV'
-                }
-                category = categories.get(cat_num, '')
+            category = OPENSKY_CATEGORIES.get(state[17], '') if len(state) > 17 else ''
             
             nearby_flights.append({
                 'callsign': callsign if callsign else icao24.upper(),
@@ -1640,11 +2030,8 @@ def get_flights_opensky(config, flight_config):
                 'to': ''  # Not available
             })
         
-        # Sort by distance and get nearest 5
-        nearby_flights.sort(key=lambda x: x['distance'])
-        nearest = nearby_flights[:5]
-        
-        return jsonify({'success': True, 'flights': nearest})
+        # Get nearest 5 by distance
+        return nearest_flights_response(nearby_flights, 5)
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching flights from OpenSky: {e}")
@@ -1667,43 +2054,19 @@ def get_flights_airlabs(config, flight_config):
         radius_km = flight_config.get('radius_km', 75)
         
         # Calculate bounding box (approximately)
-        # 1 degree latitude ≈ 111 km
-        # 1 degree longitude ≈ 111 km * cos(latitude)
-        import math
-        lat_delta = radius_km / 111.0
-        lon_delta = radius_km / (111.0 * math.cos(math.radians(lat)))
-        
-        lat_min = lat - lat_delta
-        lat_max = lat + lat_delta
-        lon_min = lon - lon_delta
-        lon_max = lon + lon_delta
-        
-        # Airline code to name mapping
-        airline_names = {
-            'AA': 'American Airlines', 'DL': 'Delta', 'UA': 'United', 'WN': 'Southwest',
-            'BA': 'British Airways', 'LH': 'Lufthansa', 'AF': 'Air France', 'KL': 'KLM',
-            'EK': 'Emirates', 'QR': 'Qatar Airways', 'SQ': 'Singapore Airlines',
-            'LX': 'Swiss', 'OS': 'Austrian', 'SN': 'Brussels Airlines', 'TP': 'TAP Portugal',
-            'IB': 'Iberia', 'AZ': 'ITA Airways', 'SK': 'SAS', 'AY': 'Finnair',
-            'FR': 'Ryanair', 'U2': 'easyJet', 'W6': 'Wizz Air', 'VY': 'Vueling',
-            '6E': 'IndiGo', 'QF': 'Qantas', 'NZ': 'Air New Zealand', 'AC': 'Air Canada',
-            'NH': 'ANA', 'JL': 'JAL', 'CX': 'Cathay Pacific', 'TK': 'Turkish Airlines',
-            'ET': 'Ethiopian', 'SA': 'South African', 'EY': 'Etihad', 'SV': 'Saudia',
-            'AI': 'Air India', 'TG': 'Thai Airways', 'MH': 'Malaysia Airlines',
-            'GA': 'Garuda', 'PR': 'Philippine Airlines', 'VN': 'Vietnam Airlines',
-            'CA': 'Air China', 'MU': 'China Eastern', 'CZ': 'China Southern',
-            'AM': 'Aeromexico', 'CM': 'Copa Airlines', 'LA': 'LATAM', 'AR': 'Aerolineas',
-            'AV': 'Avianca', 'G3': 'Gol', 'JJ': 'LATAM Brasil'
-        }
+        lat_min, lat_max, lon_min, lon_max = bbox_from_radius(lat, lon, radius_km)
         
         # Call AirLabs API
-        bbox = f"{lat_min:.2f},{lon_min:.2f},{lat_max:.2f},{lon_max:.2f}"
-        url = f"https://airlabs.co/api/v9/flights?api_key={api_key}&bbox={bbox}"
+        url = "https://airlabs.co/api/v9/flights"
+        params = {
+            'api_key': api_key,
+            'bbox': f"{lat_min:.2f},{lon_min:.2f},{lat_max:.2f},{lon_max:.2f}"
+        }
         
-        response = requests.get(url, timeout=10)
+        response = http_session.get(url, params=params, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         
         if data.get('error'):
             logger.error(f"AirLabs API error: {data.get('error', {}).get('message', 'Unknown error')}")
@@ -1712,24 +2075,16 @@ def get_flights_airlabs(config, flight_config):
         flights_data = data.get('response', [])
         
         # Calculate distance and format flights
+        distance_km_from_home = make_distance_km(lat, lon)
         nearby_flights = []
         for flight in flights_data:
             if not flight.get('lat') or not flight.get('lng'):
                 continue
             
-            # Calculate distance using Haversine formula
-            lat1, lon1 = math.radians(lat), math.radians(lon)
-            lat2, lon2 = math.radians(flight['lat']), math.radians(flight['lng'])
-            
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            
-            a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-            c = 2 * math.asin(math.sqrt(a))
-            distance = 6371 * c  # Earth radius in km
+            distance = distance_km_from_home(flight['lat'], flight['lng'])
             
             airline_code = flight.get('airline_iata', '')
-            airline_name = airline_names.get(airline_code, airline_code)
+            airline_name = AIRLINE_NAMES_IATA.get(airline_code, airline_code)
             
             nearby_flights.append({
                 'callsign': flight.get('flight_icao') or flight.get('flight_iata') or flight.get('reg_number', 'Unknown'),
@@ -1745,11 +2100,8 @@ def get_flights_airlabs(config, flight_config):
                 'to': flight.get('arr_iata', '')
             })
         
-        # Sort by distance and get nearest 5
-        nearby_flights.sort(key=lambda x: x['distance'])
-        nearest = nearby_flights[:5]
-        
-        return jsonify({'success': True, 'flights': nearest})
+        # Get nearest 5 by distance
+        return nearest_flights_response(nearby_flights, 5)
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching flights from AirLabs: {e}")
@@ -1759,29 +2111,69 @@ def get_flights_airlabs(config, flight_config):
         return jsonify({'success': False, 'flights': [], 'message': str(e)})
 
 
+def get_float_arg(name, default, min_value, max_value):
+    """Read a float query argument; None if it is malformed or outside [min_value, max_value]"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        value = float(value)
+    except ValueError:
+        return None
+    return value if min_value <= value <= max_value else None
+
+
+def api_test_error_response(error, api_name):
+    """Map an exception raised while testing an upstream API to a JSON error response"""
+    if isinstance(error, requests.exceptions.Timeout):
+        message = 'Request timeout. Check your internet connection.'
+    elif isinstance(error, requests.exceptions.ConnectionError):
+        message = 'Connection error. Check your internet connection.'
+    else:
+        logger.error("Error testing %s: %s", api_name, error)
+        message = f'Error: {error}'
+    return jsonify({'success': False, 'message': message}), 500
+
+
 @app.route('/api/test/weather')
 @login_required
 def test_weather_api():
     """Test weather API with provided key"""
     try:
         api_key = request.args.get('api_key', '').strip()
-        lat = float(request.args.get('lat', 50.0))
-        lon = float(request.args.get('lon', 8.0))
+        lat = get_float_arg('lat', 50.0, -90.0, 90.0)
+        lon = get_float_arg('lon', 8.0, -180.0, 180.0)
         
         if not api_key:
             return jsonify({'success': False, 'message': 'No API key provided'}), 400
         
+        if lat is None or lon is None:
+            return jsonify({'success': False, 'message': 'Invalid coordinates'}), 400
+        
         # Log for debugging
         logger.info(f"Testing weather API with key length: {len(api_key)}, lat: {lat}, lon: {lon}")
         
+        # Start the Current Weather Data fallback right away so a failing One Call
+        # probe does not add a second sequential round-trip
+        current_future = io_executor.submit(
+            http_session.get,
+            OWM_CURRENT_URL,
+            params={'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric'},
+            timeout=HTTP_TIMEOUT
+        )
+        
         # Try One Call API 3.0 first
-        url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&appid={api_key}&units=metric&exclude=minutely,hourly,daily,alerts"
-        response = requests.get(url, timeout=10)
+        response = http_session.get(
+            OWM_ONECALL_URL,
+            params={'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric', 'exclude': OWM_ONECALL_EXCLUDE},
+            timeout=HTTP_TIMEOUT
+        )
         
         logger.info(f"One Call API 3.0 response: {response.status_code}")
         
         if response.status_code == 200:
-            data = response.json()
+            current_future.cancel()
+            data = orjson.loads(response.content)
             current = data.get('current', {})
             return jsonify({
                 'success': True,
@@ -1790,15 +2182,14 @@ def test_weather_api():
                 'location': 'One Call API 3.0'
             })
         
-        # If One Call API fails, try Current Weather Data API
+        # If One Call API fails, use the Current Weather Data API
         logger.info("Trying Current Weather Data API")
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-        response = requests.get(url, timeout=10)
+        response = current_future.result()
         
         logger.info(f"Current Weather API response: {response.status_code}")
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             return jsonify({
                 'success': True,
                 'temp': round(data['main']['temp'], 1),
@@ -1807,7 +2198,7 @@ def test_weather_api():
             })
         elif response.status_code == 401:
             try:
-                error_data = response.json()
+                error_data = orjson.loads(response.content)
                 error_msg = error_data.get('message', 'Invalid API key')
                 return jsonify({
                     'success': False, 
@@ -1822,19 +2213,14 @@ def test_weather_api():
             return jsonify({'success': False, 'message': 'API rate limit exceeded. Wait a minute and try again'}), 429
         else:
             try:
-                error_data = response.json()
+                error_data = orjson.loads(response.content)
                 error_msg = error_data.get('message', f'HTTP {response.status_code}')
             except:
                 error_msg = f'HTTP {response.status_code}'
             return jsonify({'success': False, 'message': f'API Error: {error_msg}'}), response.status_code
             
-    except requests.exceptions.Timeout:
-        return jsonify({'success': False, 'message': 'Request timeout. Check your internet connection'}), 500
-    except requests.exceptions.ConnectionError:
-        return jsonify({'success': False, 'message': 'Connection error. Check your internet connection'}), 500
     except Exception as e:
-        logger.error(f"Error testing weather API: {e}")
-        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+        return api_test_error_response(e, 'weather API')
 
 
 @app.route('/api/test/transport')
@@ -1913,14 +2299,14 @@ def test_opensky_api():
             headers['Authorization'] = f'Bearer {token}'
             auth_type = "authenticated"
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
         
         logger.info(f"OpenSky test API - Status: {response.status_code}, URL: {url}")
         if response.status_code != 200:
             logger.error(f"OpenSky test API error response: {response.text}")
         
         if response.status_code == 200:
-            flights = response.json()
+            flights = orjson.loads(response.content)
             flight_count = len(flights) if flights else 0
             
             # Get rate limit info from headers
@@ -1960,7 +2346,7 @@ def test_opensky_api():
         
         elif response.status_code == 400:
             try:
-                error_data = response.json()
+                error_data = orjson.loads(response.content)
                 error_msg = error_data.get('message', str(error_data))
             except:
                 error_msg = response.text
@@ -1975,13 +2361,8 @@ def test_opensky_api():
                 'message': f'API returned status {response.status_code}. Check OpenSky Network status.'
             }), response.status_code
             
-    except requests.exceptions.Timeout:
-        return jsonify({'success': False, 'message': 'Request timeout. Check your internet connection.'}), 500
-    except requests.exceptions.ConnectionError:
-        return jsonify({'success': False, 'message': 'Connection error. Check your internet connection.'}), 500
     except Exception as e:
-        logger.error(f"Error testing OpenSky API: {e}")
-        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+        return api_test_error_response(e, 'OpenSky API')
 
 
 @app.route('/api/test/airlabs')
@@ -2005,12 +2386,12 @@ def test_airlabs_api():
             'flight_iata': test_flight
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_session.get(url, params=params, timeout=HTTP_TIMEOUT)
         
         logger.info(f"AirLabs test API - Status: {response.status_code}, Flight: {test_flight}")
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if data and 'response' in data and len(data['response']) > 0:
                 route = data['response'][0]
@@ -2042,7 +2423,7 @@ def test_airlabs_api():
         
         else:
             try:
-                error_data = response.json()
+                error_data = orjson.loads(response.content)
                 error_msg = error_data.get('error', {}).get('message', str(error_data))
             except:
                 error_msg = response.text
@@ -2052,13 +2433,8 @@ def test_airlabs_api():
                 'message': f'API returned status {response.status_code}: {error_msg}'
             }), response.status_code
             
-    except requests.exceptions.Timeout:
-        return jsonify({'success': False, 'message': 'Request timeout. Check your internet connection.'}), 500
-    except requests.exceptions.ConnectionError:
-        return jsonify({'success': False, 'message': 'Connection error. Check your internet connection.'}), 500
     except Exception as e:
-        logger.error(f"Error testing AirLabs API: {e}")
-        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+        return api_test_error_response(e, 'AirLabs API')
 
 
 @app.route('/api/flight-routes/add', methods=['POST'])
@@ -2082,6 +2458,8 @@ def add_flight_route():
         
         # Update cache
         update_route_cache(callsign, from_airport, to_airport, cache)
+        if not save_flight_routes_cache(cache):
+            return jsonify({'success': False, 'message': 'Failed to save flight route'}), 500
         
         return jsonify({
             'success': True, 
@@ -2090,11 +2468,12 @@ def add_flight_route():
         })
         
     except Exception as e:
-        logger.error(f"Error adding flight route: {e}")
+        logger.error("Error adding flight route: %s", e)
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
 @app.route('/api/flight-routes/list')
+@conditional_response
 def list_flight_routes():
     """Get all cached flight routes"""
     try:
@@ -2105,7 +2484,7 @@ def list_flight_routes():
             'count': len(cache)
         })
     except Exception as e:
-        logger.error(f"Error listing flight routes: {e}")
+        logger.error("Error listing flight routes: %s", e)
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
@@ -2115,10 +2494,10 @@ def test_timetable_api():
     """Test timetable API with provided cohort"""
     try:
         cohort = request.args.get('cohort', '').strip()
-        max_items = int(request.args.get('max_items', 5))
+        max_items = request.args.get('max_items', 5, type=int)
         
         # Test the Almaty API directly without saving config
-        lectures = get_almaty_lectures(cohort, max_items)
+        lectures = get_almaty_lectures(cohort, max_items, use_cache=False)
         
         if lectures:
             return jsonify({
@@ -2135,26 +2514,32 @@ def test_timetable_api():
             })
         
     except Exception as e:
-        logger.error(f"Error testing timetable API: {e}")
+        logger.error("Error testing timetable API: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
 
+@lru_cache(maxsize=None)
+def render_static_page(template_name):
+    """Render a context-free template once and reuse the encoded HTML (error pages)"""
+    return render_template(template_name).encode('utf-8')
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
-    return render_template('404.html'), 404
+    return app.response_class(render_static_page('404.html'), status=404, mimetype='text/html')
 
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
-    logger.error(f"Internal error: {error}")
-    return render_template('500.html'), 500
+    logger.error("Internal error: %s", error)
+    return app.response_class(render_static_page('500.html'), status=500, mimetype='text/html')
 
 
 if __name__ == '__main__':
-    # Development server
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server; the Werkzeug debugger/reloader is opt-in since it binds to all interfaces
+    app.run(host='0.0.0.0', port=5000, debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -8,15 +8,16 @@ import os
 
 # Server socket
 bind = "0.0.0.0:8080"  # Use 8080 to avoid permission issues with port 80
-backlog = 2048
+backlog = 128  # A handful of displays/admin clients; a deep queue would only hide overload
 
 # Worker processes - optimized for Raspberry Pi 5
 # Pi 5 has 4 cores, use 2 workers to leave resources for display
 workers = 2  # Use 2 workers for better performance
-worker_class = "sync"
-worker_connections = 100  # Reduced from 1000
+worker_class = "gthread"  # Threaded workers so slow upstream APIs don't block other polls
+threads = 8  # Threads per worker (requests mostly wait on upstream APIs, not CPU)
+worker_connections = 100  # Max open connections per gthread worker (incl. keep-alive)
 timeout = 120  # Increased from 30 to prevent worker timeouts
-keepalive = 5  # Increased to keep connections alive longer
+keepalive = 30  # Dashboards poll every few seconds; reuse the connection (nginx upstream idles 25s)
 preload_app = True  # Preload app to speed up worker startup
 graceful_timeout = 30  # Time to wait for workers to finish requests during restart
 
@@ -31,6 +32,7 @@ umask = 0
 user = None  # Run as the user specified in systemd service
 group = None
 tmp_upload_dir = None
+sendfile = True  # Serve wsgi.file_wrapper responses (Flask static files) with sendfile(2)
 
 # Systemd integration
 systemd_bind = True  # Use systemd socket activation if available
@@ -355,19 +355,44 @@ configure_nginx() {
     # Create nginx config for port 80 (main access)
     print_info "Creating nginx configuration..."
     cat > "/etc/nginx/sites-available/$SERVICE_NAME" << 'EOF'
+# Reuse connections to gunicorn instead of opening one per proxied request
+upstream digital_signage_app {
+    server 127.0.0.1:5000;
+    keepalive 8;
+    keepalive_requests 10000;
+    keepalive_timeout 25s;  # Below gunicorn's keepalive so nginx never reuses a closed socket
+}
+
 server {
     listen 80;
     server_name _;
 
+    # Compress JSON API responses and SVG icons (gunicorn sends everything uncompressed)
+    gzip on;
+    gzip_comp_level 4;
+    gzip_min_length 500;
+    gzip_proxied any;
+    gzip_types application/json image/svg+xml;
+    gzip_vary on;
+
+    # Serve static assets (icons, aircraft silhouettes) straight from disk
+    location /static/ {
+        alias /opt/digital-signage/static/;
+        sendfile on;
+        tcp_nopush on;
+        expires 1h;  # Same max-age Flask uses when it serves them directly
+        open_file_cache max=500 inactive=10m;
+        open_file_cache_valid 60s;
+    }
+
     location / {
-        proxy_pass http://127.0.0.1:5000;
+        proxy_pass http://digital_signage_app;
         proxy_set_header Host $host;
         proxy_set_header X-Real-IP $remote_addr;
         proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
         proxy_set_header X-Forwarded-Proto $scheme;
         proxy_http_version 1.1;
-        proxy_set_header Upgrade $http_upgrade;
-        proxy_set_header Connection "upgrade";
+        proxy_set_header Connection "";  # Keep the upstream connection open (no WebSockets here)
     }
 }
 EOF